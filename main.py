@@ -3,9 +3,32 @@
 #inez salazar
 
 
-import pygame as pg
-from source.main import main
+import os
+import argparse
 
 if __name__=='__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Super Mario Bros')
+    parser.add_argument('--dirty-rect', action='store_true',
+                        help='only update the changed parts of the screen')
+    parser.add_argument('--headless', action='store_true',
+                        help='simulate without a window and without drawing, as fast as possible')
+    parser.add_argument('--frames', type=int, default=None,
+                        help='stop after this number of frames')
+    parser.add_argument('--fixed-step', action='store_true',
+                        help='advance the game time by 1/60 second every frame (always on when headless)')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='run at this multiple of 60 frames per second, 0 for as fast as possible')
+    parser.add_argument('--record', metavar='FILE', default=None,
+                        help='record the keys of every frame into FILE')
+    parser.add_argument('--replay', metavar='FILE', default=None,
+                        help='play the keys recorded in FILE instead of the keyboard')
+    args = parser.parse_args()
+    if args.headless:
+        # must be set before pygame initializes the display in source.setup
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+    import pygame as pg
+    from source.main import main
+    main(args.dirty_rect, args.headless, args.frames, args.fixed_step, args.speed,
+        args.record, args.replay)
     pg.quit()
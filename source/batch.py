@@ -0,0 +1,163 @@
+"""
+Runs many level playthroughs in parallel in headless game instances.
+
+Each worker process of a multiprocessing pool initializes pygame with the dummy video
+driver and loads the graphics once, then plays episodes one after another. An episode
+starts a level and feeds it the keys of an input replay (see source.replay) or of a
+policy, with a fixed step clock, until the player dies, the level is finished or the
+input runs out. Replays are recorded with main.py --record and so start at the main
+menu, they are played by a whole headless game instead of a single level.
+
+    $ python -m source.batch --workers 4 run1.rpl run2.rpl
+    $ python -m source.batch --level 2 --policy run_right --episodes 100
+"""
+
+import time
+import argparse
+import multiprocessing
+from collections import namedtuple
+
+from . import tools, replay
+from . import constants as c
+from .states import level
+
+Episode = namedtuple('Episode', ['level_num', 'player_name', 'replay_path',
+                                'policy', 'max_frames'],
+                    defaults=[c.PLAYER_MARIO, None, None, 60 * 60 * 5])
+
+EpisodeResult = namedtuple('EpisodeResult', ['level_num', 'player_name', 'score',
+                        'coins', 'time_remaining', 'dead', 'death_x', 'finished',
+                        'frames'])
+
+def init_worker():
+    '''initialize a headless game in this process, graphics are loaded only once'''
+    from . import setup
+    setup.init(headless=True)
+
+def new_game_info(level_num, player_name):
+    return {c.COIN_TOTAL: 0,
+            c.SCORE: 0,
+            c.LIVES: 3,
+            c.TOP_SCORE: 0,
+            c.CURRENT_TIME: 0.0,
+            c.LEVEL_NUM: level_num,
+            c.PLAYER_NAME: player_name}
+
+# a policy is called with the frame number and the level, and returns the
+# bitmask of the pressed inputs (see replay.INPUT_LIST)
+
+def run_right(frame, level_state):
+    '''a simple policy: run to the right and jump now and then'''
+    if frame % 45 < 20:
+        return replay.make_mask('right', 'action', 'jump')
+    return replay.make_mask('right', 'action')
+
+def idle(frame, level_state):
+    '''a policy which never presses a key'''
+    return 0
+
+POLICIES = {'run_right': run_right, 'idle': idle}
+
+def get_result(level_state, frames):
+    player = level_state.player
+    game_info = level_state.game_info
+    return EpisodeResult(game_info[c.LEVEL_NUM], game_info[c.PLAYER_NAME],
+                        game_info[c.SCORE], game_info[c.COIN_TOTAL],
+                        level_state.overhead_info.time, player.dead,
+                        player.rect.x if player.dead else None,
+                        level_state.done and not player.dead, frames)
+
+def get_not_reached_result(frames):
+    '''the result of a replay which never left the menu to play a level'''
+    return EpisodeResult(None, None, None, None, None, False, None, False, frames)
+
+def run_replay(episode):
+    # main imports setup, only where a game is played
+    from .main import create_states
+    game = tools.Control(headless=True, game_clock=tools.FixedStepClock(),
+                        input_replay=replay.InputReplay.load(episode.replay_path))
+    game.setup_states(create_states(), c.MAIN_MENU)
+    game.main(episode.max_frames)
+    # the states are created when they are entered, without prewarming
+    if c.LEVEL not in game.state_dict.states:
+        return get_not_reached_result(game.frames)
+    return get_result(game.state_dict[c.LEVEL], game.frames)
+
+# the level the episodes of this process are played in
+worker_level = None
+
+def run_episode(episode):
+    if episode.replay_path is not None:
+        return run_replay(episode)
+
+    # the level of the last episode, so that it is reset from its template, as if the
+    # game left it, with a new player as a level keeps its player between startups
+    global worker_level
+    if worker_level is None:
+        worker_level = level.Level()
+    level_state = worker_level
+    level_state.cleanup()
+    level_state.player = None
+    game_clock = tools.FixedStepClock()
+    level_state.startup(game_clock.next_frame(),
+                        new_game_info(episode.level_num, episode.player_name))
+    policy = POLICIES.get(episode.policy, episode.policy)
+    decoder = replay.KeyDecoder()
+
+    frames = 0
+    while not level_state.done and frames < episode.max_frames:
+        keys = decoder.get_keys(policy(frames, level_state))
+        level_state.update(None, keys, game_clock.next_frame())
+        frames += 1
+    return get_result(level_state, frames)
+
+def run_batch(episodes, workers=None, chunksize=1):
+    '''run the episodes in a pool of worker processes, return the results in episode order'''
+    pool = multiprocessing.Pool(workers, initializer=init_worker)
+    try:
+        results = pool.map(run_episode, episodes, chunksize)
+    finally:
+        # pygame catches SIGTERM in the workers, so pool.terminate() would wait for
+        # them forever, let them exit by themselves instead
+        pool.close()
+        pool.join()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='run level playthroughs in parallel')
+    parser.add_argument('replays', nargs='*', help='input replay files, one episode each')
+    parser.add_argument('--level', type=int, default=1, choices=[1, 2, 3, 4],
+                        help='the level played with the policy')
+    parser.add_argument('--player', default=c.PLAYER_MARIO,
+                        choices=[c.PLAYER_MARIO, c.PLAYER_LUIGI],
+                        help='the player of the policy episodes')
+    parser.add_argument('--policy', default=None, choices=sorted(POLICIES),
+                        help='play the episodes with this policy instead of replays')
+    parser.add_argument('--episodes', type=int, default=1,
+                        help='the number of episodes to play with the policy')
+    parser.add_argument('--max-frames', type=int, default=60 * 60 * 5)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of worker processes, the number of cores by default')
+    args = parser.parse_args(argv)
+
+    if args.policy is not None:
+        episodes = [Episode(args.level, args.player, None, args.policy, args.max_frames)
+                    for _ in range(args.episodes)]
+    else:
+        episodes = [Episode(args.level, args.player, path, None, args.max_frames)
+                    for path in args.replays]
+    if not episodes:
+        parser.error('give replay files or a policy')
+
+    start = time.perf_counter()
+    results = run_batch(episodes, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(result)
+    frames = sum(result.frames for result in results)
+    print('%d episodes, %d frames in %.2f seconds, %.0f frames per second' %
+            (len(results), frames, elapsed, frames / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmarks of the game, run headless with the dummy video driver.
+
+    $ python -m source.bench frames
+
+plays each level in a process of its own with the run_right policy (see
+source.batch), drawing every frame into the screen, and reports the time of a
+frame and the peak resident memory of the process.
+
+    $ python -m source.bench alloc
+
+plays each level without drawing and reports, after a warm up, the sprite groups
+created per frame and the memory allocated while playing (with tracemalloc).
+
+    $ python -m source.bench hashes
+
+plays the regression scenarios, each level with both players and the boss of
+level 4, and prints a hash of the screens of every frame of each. Run these
+before and after a change to compare.
+
+    $ python -m source.bench imports
+
+imports every component module with python -X importtime and fails if that takes
+more than IMPORT_BUDGET_MS on top of importing pygame, or if it initializes the
+display or imports source.setup.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import tracemalloc
+
+from . import constants as c
+
+LEVELS = (1, 2, 3, 4)
+# the time importing all the components may take, pygame itself not counted
+IMPORT_BUDGET_MS = 50
+
+def get_peak_rss():
+    '''return the peak resident memory of this process in MB, None where it is unknown'''
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+def start_level(level_num, player_name=c.PLAYER_MARIO):
+    from . import setup, tools, replay, batch
+    from .states import level
+    setup.init(headless=True)
+    level_state = level.Level()
+    game_clock = tools.FixedStepClock()
+    level_state.startup(game_clock.next_frame(), batch.new_game_info(level_num, player_name))
+    return level_state, game_clock, replay.KeyDecoder()
+
+def play(level_state, game_clock, decoder, first_frame, frames, surface=None, policy=None):
+    '''play frames of the level with the policy, run_right by default, return the seconds
+       of each frame'''
+    from . import batch
+    policy = policy or batch.run_right
+    level_num = level_state.game_info[c.LEVEL_NUM]
+    times = []
+    for frame in range(first_frame, first_frame + frames):
+        keys = decoder.get_keys(policy(frame, level_state))
+        start = time.perf_counter()
+        level_state.update(surface, keys, game_clock.next_frame())
+        times.append(time.perf_counter() - start)
+        if level_state.done:
+            # the player died, start the level again as the game does
+            persist = level_state.cleanup()
+            persist[c.LEVEL_NUM] = level_num
+            level_state.startup(game_clock.next_frame(), persist)
+    return times
+
+def bench_frames(level_num, frames):
+    from . import setup
+    times = sorted(play(*start_level(level_num), 0, frames, setup.SCREEN))
+    rss = get_peak_rss()
+    print('level %d: %d frames, frame %.3f ms median, %.3f ms mean, %.3f ms max, '
+          'peak RSS %s' % (level_num, frames, times[len(times) // 2] * 1000,
+          sum(times) / len(times) * 1000, times[-1] * 1000,
+          'unknown' if rss is None else '%.1f MB' % rss))
+
+def bench_alloc(level_num, frames, warm_up=300):
+    import pygame as pg
+    level_state, game_clock, decoder = start_level(level_num)
+    play(level_state, game_clock, decoder, 0, warm_up)
+
+    groups = 0
+    group_init = pg.sprite.AbstractGroup.__init__
+    def counting_init(self, *args, **kwargs):
+        nonlocal groups
+        groups += 1
+        group_init(self, *args, **kwargs)
+    pg.sprite.AbstractGroup.__init__ = counting_init
+    tracemalloc.start()
+    try:
+        play(level_state, game_clock, decoder, warm_up, frames)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        pg.sprite.AbstractGroup.__init__ = group_init
+    print('level %d: %d frames, %.2f sprite groups created per frame, '
+          'tracemalloc %.1f KB kept, %.1f KB peak' % (level_num, frames,
+          groups / frames, current / 2**10, peak / 2**10))
+
+def get_scenarios():
+    '''return the (name, level number, player name, policy name, frames, start x) of each
+       scenario of the hashes command, a start x puts the player there'''
+    scenarios = [('level_%d_%s' % (level_num, player_name), level_num, player_name,
+                  'run_right', 2500, None)
+                 for level_num in LEVELS for player_name in (c.PLAYER_MARIO, c.PLAYER_LUIGI)]
+    # standing in front of the boss of level 4, whose fireballs cross the screen
+    scenarios.append(('level_4_boss', 4, c.PLAYER_MARIO, 'idle', 900, 3895))
+    return scenarios
+
+def hash_scenarios(level_num=None, frames=None):
+    '''print a hash of the screens of every frame of each scenario'''
+    import hashlib
+    import pygame as pg
+    from . import setup, batch
+    for name, scenario_level, player_name, policy, scenario_frames, start_x in get_scenarios():
+        if level_num is not None and scenario_level != level_num:
+            continue
+        level_state, game_clock, decoder = start_level(scenario_level, player_name)
+        if start_x is not None:
+            level_state.player.rect.x = start_x
+            level_state.viewport.x = start_x - 110
+        screens = hashlib.sha1()
+        for frame in range(frames or scenario_frames):
+            play(level_state, game_clock, decoder, frame, 1, setup.SCREEN,
+                 batch.POLICIES[policy])
+            screens.update(pg.image.tobytes(setup.SCREEN, 'RGB'))
+        print(name, screens.hexdigest()[:12])
+
+def get_component_modules():
+    import pkgutil
+    from . import components
+    return ['%s.%s' % (components.__name__, info.name)
+            for info in pkgutil.iter_modules(components.__path__)]
+
+def check_imports():
+    '''import the components in a new python, exit with an error if it is over budget'''
+    modules = get_component_modules()
+    code = ('import sys, pygame\n'
+            'import %s\n'
+            'print(pygame.display.get_init(), "source.setup" in sys.modules)' % ', '.join(modules))
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    # once without timing, so that compiling the modules is not counted, the
+    # compiled modules must be written for that
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, check=True)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                             capture_output=True, text=True, check=True)
+
+    # import time: self [us] | cumulative | imported package, nested imports are
+    # indented. everything imported at the top level after pygame is the components
+    total = 0
+    after_pygame = False
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            continue
+        if after_pygame:
+            total += int(cumulative)
+        elif name.strip() == 'pygame':
+            after_pygame = True
+    display_init, setup_imported = process.stdout.split()
+
+    total_ms = total / 1000
+    print('%d component modules imported in %.1f ms (budget %d ms), display initialized: '
+          '%s, source.setup imported: %s' % (len(modules), total_ms, IMPORT_BUDGET_MS,
+          display_init, setup_imported))
+    if total_ms > IMPORT_BUDGET_MS:
+        sys.exit('importing the components is over budget')
+    if display_init == 'True' or setup_imported == 'True':
+        sys.exit('importing the components initializes the game')
+
+BENCHMARKS = {'frames': bench_frames, 'alloc': bench_alloc}
+
+def run_in_process(command, level_num, frames):
+    '''run a benchmark of one level in a new process, so it starts with fresh memory'''
+    subprocess.run([sys.executable, '-m', 'source.bench', command, '--level', str(level_num),
+                    '--frames', str(frames)], check=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='benchmark the game headless')
+    parser.add_argument('command', choices=sorted(BENCHMARKS) + ['hashes', 'imports'],
+                        help='frames: frame time and memory of each level, '
+                             'alloc: allocations while playing each level, '
+                             'hashes: hashes of the screens of the regression scenarios, '
+                             'imports: check the import time of the components')
+    parser.add_argument('--level', type=int, default=None, choices=LEVELS,
+                        help='only this level, in this process')
+    parser.add_argument('--frames', type=int, default=None,
+                        help='the frames played, 600 by default, all of each scenario '
+                             'for hashes')
+    args = parser.parse_args(argv)
+
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    if args.command == 'imports':
+        check_imports()
+    elif args.command == 'hashes':
+        hash_scenarios(args.level, args.frames)
+    elif args.level is not None:
+        BENCHMARKS[args.command](args.level, args.frames or 600)
+    else:
+        for level_num in LEVELS:
+            run_in_process(args.command, level_num, args.frames or 600)
+
+if __name__ == '__main__':
+    main()
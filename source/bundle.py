@@ -0,0 +1,206 @@
+"""
+A bundle of the graphics in the form the game uses them: the converted sprite
+sheets, every frame cut out of them by tools.get_image and the level backgrounds
+scaled by c.BACKGROUND_MULTIPLER, stored as raw pixels in one file.
+
+    $ python -m source.bundle
+
+builds resources/graphics.bundle, by creating every state and every kind of sprite
+of the game once and saving what they loaded. setup loads the bundle if it exists:
+the file is memory mapped and the images are surfaces on its pixels, so nothing is
+decoded, cut or scaled and worker processes share the pages of the file. Images
+which are not in the bundle are still loaded from the graphics directory.
+
+The bundle stores the size and modification time of each image file it was built
+from, it is not used once one of them has changed. Rebuild it after changing
+the code which cuts the frames.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import pygame as pg
+from . import tools
+from . import constants as c
+
+MAGIC = b'SMBG'
+VERSION = 1
+GRAPHICS_PATH = os.path.join('resources', 'graphics')
+BUNDLE_PATH = os.path.join('resources', 'graphics.bundle')
+
+# magic, version, length of the index
+HEADER = struct.Struct('<4sII')
+
+def get_file_stamp(file_path):
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def create_all_sprites(context):
+    '''create every state and every kind of sprite once, which cuts all their frames'''
+    from .states import main_menu, level
+    from .components import info, coin, powerup, brick, enemy, stuff
+
+    main_menu.Menu(context)
+    for player_name in (c.PLAYER_MARIO, c.PLAYER_LUIGI):
+        for level_num in range(1, 5):
+            game_info = {c.COIN_TOTAL: 0,
+                         c.SCORE: 0,
+                         c.LIVES: 3,
+                         c.TOP_SCORE: 0,
+                         c.CURRENT_TIME: 0.0,
+                         c.LEVEL_NUM: level_num,
+                         c.PLAYER_NAME: player_name}
+            for state in (c.LOAD_SCREEN, c.GAME_OVER, c.TIME_OUT):
+                info.Info(context, game_info, state)
+            level_state = level.Level(context)
+            level_state.startup(0.0, game_info)
+            for index in range(len(level_state.enemy_group_list)):
+                level_state.get_enemy_group(index)
+
+    # the sprites which only appear while playing
+    powerup.Mushroom(context, 0, 0)
+    powerup.LifeMushroom(context, 0, 0)
+    powerup.FireFlower(context, 0, 0)
+    powerup.Star(context, 0, 0)
+    powerup.FireBall(context, 0, 0, True)
+    coin.Coin(context, 0, 0, None)
+    brick.BrickPiece(context, 0, 0, 0, 0)
+    enemy.Fire(context, 0, 0, c.LEFT)
+    stuff.Score(context, 0, 0, 100)
+
+def get_pixels(image):
+    return pg.image.tobytes(image, 'BGRA')
+
+def get_colorkey(image):
+    colorkey = image.get_colorkey()
+    return None if colorkey is None else list(colorkey[:3])
+
+def build(file_path=BUNDLE_PATH, directory=GRAPHICS_PATH):
+    '''write the bundle of the images of the directory, return its index'''
+    from . import setup
+    from .context import GameContext
+    setup.init()
+    # images loaded from the files, not from the bundle setup may have loaded
+    gfx = tools.load_all_gfx(directory, evictable=setup.is_background)
+    create_all_sprites(GameContext(gfx, setup.SCREEN_RECT))
+
+    blocks = []
+    offset = 0
+    def add_block(image):
+        nonlocal offset
+        pixels = get_pixels(image)
+        blocks.append(pixels)
+        entry = [offset, image.get_width(), image.get_height(), get_colorkey(image),
+                bool(image.get_flags() & pg.SRCALPHA)]
+        offset += len(pixels)
+        return entry
+
+    index = {'sheets': {}, 'frames': [], 'scaled': [], 'stamps': {}}
+    sheet_names = {}
+    for name, image in gfx.images.items():
+        if gfx.evictable is not None and gfx.evictable(name):
+            continue
+        sheet_names[image] = name
+        index['sheets'][name] = add_block(image)
+        index['stamps'][name] = get_file_stamp(gfx.paths[name])
+
+    for key, image in tools.frame_cache.frames.items():
+        sheet, x, y, width, height, colorkey, scale, flip_x, flip_y = key
+        if sheet not in sheet_names:
+            continue
+        index['frames'].append([sheet_names[sheet], x, y, width, height, list(colorkey),
+                                scale, flip_x, flip_y] + add_block(image))
+
+    for name in gfx:
+        if gfx.evictable is not None and gfx.evictable(name):
+            image = gfx.get_scaled(name, c.BACKGROUND_MULTIPLER)
+            index['scaled'].append([name, c.BACKGROUND_MULTIPLER] + add_block(image))
+            index['stamps'][name] = get_file_stamp(gfx.paths[name])
+
+    data = json.dumps(index).encode('utf-8')
+    # the pixels start at a multiple of 64 bytes
+    padding = -(HEADER.size + len(data)) % 64
+    with open(file_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(data) + padding))
+        f.write(data + b' ' * padding)
+        for pixels in blocks:
+            f.write(pixels)
+    return index
+
+class Bundle():
+    """
+    A memory mapped bundle file.
+
+    Attributes:
+        index (dict): The sheets, frames and scaled images of the bundle with the
+            offset, size, colorkey and alpha of their pixels, and the file stamps.
+    """
+
+    def __init__(self, file_path=BUNDLE_PATH):
+        with open(file_path, 'rb') as f:
+            magic, version, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('%s is not a graphics bundle of version %d' % (file_path, VERSION))
+            self.index = json.loads(f.read(length))
+            # a private mapping, the pixels can be written without changing the file
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.pixels = memoryview(self.map)[HEADER.size + length:]
+
+    def is_current(self, gfx):
+        '''return True if none of the image files changed since the bundle was built'''
+        for name, stamp in self.index['stamps'].items():
+            if name not in gfx.paths or get_file_stamp(gfx.paths[name]) != stamp:
+                return False
+        return True
+
+    def get_image(self, entry):
+        '''return a surface on the pixels of an index entry, no pixels are copied'''
+        offset, width, height, colorkey, alpha = entry
+        if width == 0 or height == 0:
+            # the empty frames of the score digits which are never shown
+            image = pg.Surface((width, height))
+        else:
+            image = pg.image.frombuffer(self.pixels[offset:offset + width*height*4],
+                                        (width, height), 'BGRA')
+        if not alpha:
+            image.set_alpha(None)
+        if colorkey is not None:
+            image.set_colorkey(colorkey)
+        return image
+
+def load_bundle(gfx, file_path=BUNDLE_PATH, frame_cache=tools.frame_cache):
+    '''
+    put the images of the bundle into gfx and its frames into the frame cache, return
+    the bundle, or None if there is no bundle or it is out of date
+    '''
+    if not os.path.exists(file_path):
+        return None
+    bundle = Bundle(file_path)
+    if not bundle.is_current(gfx):
+        return None
+
+    for name, entry in bundle.index['sheets'].items():
+        # frames are cached by sheet, an already loaded sheet keeps its image
+        if name not in gfx.images:
+            gfx.add(name, bundle.get_image(entry))
+    for entry in bundle.index['frames']:
+        name, x, y, width, height, colorkey, scale, flip_x, flip_y = entry[:9]
+        key = (gfx[name], x, y, width, height, tuple(colorkey), scale, flip_x, flip_y)
+        if key not in frame_cache.frames:
+            frame_cache.frames[key] = bundle.get_image(entry[9:])
+    for entry in bundle.index['scaled']:
+        gfx.add_scaled(entry[0], entry[1], bundle.get_image(entry[2:]))
+    return bundle
+
+def main(argv=None):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    file_path = argv[0] if argv else BUNDLE_PATH
+    index = build(file_path)
+    print('%s: %d sheets, %d frames, %d scaled images, %.1f MB' % (file_path,
+            len(index['sheets']), len(index['frames']), len(index['scaled']),
+            os.path.getsize(file_path) / 2**20))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
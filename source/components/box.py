@@ -1,17 +1,18 @@
 __author__ = 'marble_xu'
 
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 from . import coin, powerup
 
 class Box(pg.sprite.Sprite):
-    def __init__(self, x, y, type, group=None, name=c.MAP_BOX):
+    def __init__(self, context, x, y, type, group=None, name=c.MAP_BOX):
         pg.sprite.Sprite.__init__(self)
+        self.context = context
         
         self.frames = []
         self.frame_index = 0
-        self.load_frames()
+        self.load_frames(context.gfx['tile_set'])
         self.image = self.frames[self.frame_index]
         self.rect = self.image.get_rect()
         self.rect.x = x
@@ -27,8 +28,7 @@ class Box(pg.sprite.Sprite):
         self.group = group
         self.name = name
         
-    def load_frames(self):
-        sheet = setup.GFX['tile_set']
+    def load_frames(self, sheet):
         frame_rect_list = [(384, 0, 16, 16), (400, 0, 16, 16), 
             (416, 0, 16, 16), (400, 0, 16, 16), (432, 0, 16, 16)]
         for frame_rect in frame_rect_list:
@@ -60,11 +60,11 @@ class Box(pg.sprite.Sprite):
             self.rect.y = self.rest_height
             self.state = c.OPENED
             if self.type == c.TYPE_MUSHROOM:
-                self.group.add(powerup.Mushroom(self.rect.centerx, self.rect.y))
+                self.group.add(powerup.Mushroom(self.context, self.rect.centerx, self.rect.y))
             elif self.type == c.TYPE_FIREFLOWER:
-                self.group.add(powerup.FireFlower(self.rect.centerx, self.rect.y))
+                self.group.add(powerup.FireFlower(self.context, self.rect.centerx, self.rect.y))
             elif self.type == c.TYPE_LIFEMUSHROOM:
-                self.group.add(powerup.LifeMushroom(self.rect.centerx, self.rect.y))
+                self.group.add(powerup.LifeMushroom(self.context, self.rect.centerx, self.rect.y))
         self.frame_index = 4
         self.image = self.frames[self.frame_index]
     
@@ -73,4 +73,4 @@ class Box(pg.sprite.Sprite):
         self.state = c.BUMPED
         
         if self.type == c.TYPE_COIN:
-            self.group.add(coin.Coin(self.rect.centerx, self.rect.y, score_group))
+            self.group.add(coin.Coin(self.context, self.rect.centerx, self.rect.y, score_group))
@@ -1,7 +1,7 @@
 __author__ = 'marble_xu'
 
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 from . import coin, stuff, powerup
 
@@ -13,22 +13,22 @@ def create_brick(brick_group, item, level):
 
     x, y, type = item['x'], item['y'], item['type']
     if type == c.TYPE_COIN:
-        brick_group.add(Brick(x, y, type, 
+        brick_group.add(Brick(level.context, x, y, type, 
                     color, level.coin_group))
     elif (type == c.TYPE_STAR or
         type == c.TYPE_FIREFLOWER or
         type == c.TYPE_LIFEMUSHROOM):
-        brick_group.add(Brick(x, y, type,
+        brick_group.add(Brick(level.context, x, y, type,
                     color, level.powerup_group))
     else:
         if c.BRICK_NUM in item:
-            create_brick_list(brick_group, item[c.BRICK_NUM], x, y, type,
+            create_brick_list(level.context, brick_group, item[c.BRICK_NUM], x, y, type,
                         color, item['direction'])
         else:
-            brick_group.add(Brick(x, y, type, color))
+            brick_group.add(Brick(level.context, x, y, type, color))
             
             
-def create_brick_list(brick_group, num, x, y, type, color, direction):
+def create_brick_list(context, brick_group, num, x, y, type, color, direction):
     ''' direction:horizontal, create brick from left to right, direction:vertical, create brick from up to bottom '''
     size = 43 # 16 * c.BRICK_SIZE_MULTIPLIER is 43
     tmp_x, tmp_y = x, y
@@ -37,18 +37,19 @@ def create_brick_list(brick_group, num, x, y, type, color, direction):
             tmp_y = y + i * size
         else:
             tmp_x = x + i * size
-        brick_group.add(Brick(tmp_x, tmp_y, type, color))
+        brick_group.add(Brick(context, tmp_x, tmp_y, type, color))
         
 class Brick(stuff.Stuff):
-    def __init__(self, x, y, type, color=c.ORANGE, group=None, name=c.MAP_BRICK):
+    def __init__(self, context, x, y, type, color=c.ORANGE, group=None, name=c.MAP_BRICK):
         orange_rect = [(16, 0, 16, 16), (432, 0, 16, 16)]
         green_rect = [(208, 32, 16, 16), (48, 32, 16, 16)]
         if color == c.COLOR_TYPE_ORANGE:
             frame_rect = orange_rect
         else:
             frame_rect = green_rect
-        stuff.Stuff.__init__(self, x, y, setup.GFX['tile_set'],
+        stuff.Stuff.__init__(self, x, y, context.gfx['tile_set'],
                         frame_rect, c.BRICK_SIZE_MULTIPLIER)
+        self.context = context
 
         self.rest_height = y
         self.state = c.RESTING
@@ -79,13 +80,13 @@ class Brick(stuff.Stuff):
                     self.state = c.OPENED
             elif self.type == c.TYPE_STAR:
                 self.state = c.OPENED
-                self.group.add(powerup.Star(self.rect.centerx, self.rest_height))
+                self.group.add(powerup.Star(self.context, self.rect.centerx, self.rest_height))
             elif self.type == c.TYPE_FIREFLOWER:
                 self.state = c.OPENED
-                self.group.add(powerup.FireFlower(self.rect.centerx, self.rest_height))
+                self.group.add(powerup.FireFlower(self.context, self.rect.centerx, self.rest_height))
             elif self.type == c.TYPE_LIFEMUSHROOM:
                 self.state = c.OPENED
-                self.group.add(powerup.LifeMushroom(self.rect.centerx, self.rest_height))
+                self.group.add(powerup.LifeMushroom(self.context, self.rect.centerx, self.rest_height))
             else:
                 self.state = c.RESTING
         
@@ -94,7 +95,7 @@ class Brick(stuff.Stuff):
         
         if self.type == c.TYPE_COIN:
             if self.coin_num > 0:
-                self.group.add(coin.Coin(self.rect.centerx, self.rect.y, score_group))
+                self.group.add(coin.Coin(self.context, self.rect.centerx, self.rect.y, score_group))
                 self.coin_num -= 1
                 if self.coin_num == 0:
                     self.frame_index = 1
@@ -114,12 +115,12 @@ class Brick(stuff.Stuff):
                     (self.rect.right, self.rect.y, 2, -6)]
         
         for arg in arg_list:
-            group.add(BrickPiece(*arg))
+            group.add(BrickPiece(self.context, *arg))
         self.kill()
         
 class BrickPiece(stuff.Stuff):
-    def __init__(self, x, y, x_vel, y_vel):
-        stuff.Stuff.__init__(self, x, y, setup.GFX['tile_set'],
+    def __init__(self, context, x, y, x_vel, y_vel):
+        stuff.Stuff.__init__(self, x, y, context.gfx['tile_set'],
             [(68, 20, 8, 8)], c.BRICK_SIZE_MULTIPLIER)
         self.x_vel = x_vel
         self.y_vel = y_vel
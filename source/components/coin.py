@@ -1,16 +1,16 @@
 __author__ = 'marble_xu'
 
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 
 class Coin(pg.sprite.Sprite):
-    def __init__(self, x, y, score_group):
+    def __init__(self, context, x, y, score_group):
         pg.sprite.Sprite.__init__(self)
         
         self.frames = []
         self.frame_index = 0
-        self.load_frames()
+        self.load_frames(context.gfx[c.ITEM_SHEET])
         self.image = self.frames[self.frame_index]
         self.rect = self.image.get_rect()
         self.rect.centerx = x
@@ -21,8 +21,7 @@ class Coin(pg.sprite.Sprite):
         self.initial_height = self.rect.bottom - 5
         self.score_group = score_group
         
-    def load_frames(self):
-        sheet = setup.GFX[c.ITEM_SHEET]
+    def load_frames(self, sheet):
         frame_rect_list = [(52, 113, 8, 14), (4, 113, 8, 14), 
                         (20, 113, 8, 14), (36, 113, 8, 14)]
         for frame_rect in frame_rect_list:
@@ -49,19 +48,18 @@ class Coin(pg.sprite.Sprite):
             self.kill()
             
 class FlashCoin(pg.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, context, x, y):
         pg.sprite.Sprite.__init__(self)
         self.frame_index = 0
         self.frames = []
-        self.load_frames()
+        self.load_frames(context.gfx[c.ITEM_SHEET])
         self.image = self.frames[self.frame_index]
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
         self.animation_timer = 0
         
-    def load_frames(self):
-        sheet = setup.GFX[c.ITEM_SHEET]
+    def load_frames(self, sheet):
         frame_rect_list = [(1, 160, 5, 8), (9, 160, 5, 8),
                         (17, 160, 5, 8), (9, 160, 5, 8)]
         for frame_rect in frame_rect_list:
@@ -81,19 +79,18 @@ class FlashCoin(pg.sprite.Sprite):
         self.image = self.frames[self.frame_index]
 
 class StaticCoin(pg.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, context, x, y):
         pg.sprite.Sprite.__init__(self)
         self.frame_index = 0
         self.frames = []
-        self.load_frames()
+        self.load_frames(context.gfx[c.ITEM_SHEET])
         self.image = self.frames[self.frame_index]
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
         self.animation_timer = 0
 
-    def load_frames(self):
-        sheet = setup.GFX[c.ITEM_SHEET]
+    def load_frames(self, sheet):
         frame_rect_list = [(3, 98, 9, 13), (19, 98, 9, 13),
                         (35, 98, 9, 13), (51, 98, 9, 13)]
         for frame_rect in frame_rect_list:
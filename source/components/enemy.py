@@ -2,7 +2,7 @@ __author__ = 'marble_xu'
 
 import math
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 
 ENEMY_SPEED = 1
@@ -19,20 +19,20 @@ def create_enemy(item, level):
         range_start = range_end = 0
 
     if item['type'] == c.ENEMY_TYPE_GOOMBA:
-        sprite = Goomba(item['x'], item['y'], dir, color,
+        sprite = Goomba(level.context, item['x'], item['y'], dir, color,
             in_range, range_start, range_end)
     elif item['type'] == c.ENEMY_TYPE_KOOPA:
-        sprite = Koopa(item['x'], item['y'], dir, color,
+        sprite = Koopa(level.context, item['x'], item['y'], dir, color,
             in_range, range_start, range_end)
     elif item['type'] == c.ENEMY_TYPE_FLY_KOOPA:
         isVertical = False if item['is_vertical'] == 0 else True
-        sprite = FlyKoopa(item['x'], item['y'], dir, color,
+        sprite = FlyKoopa(level.context, item['x'], item['y'], dir, color,
             in_range, range_start, range_end, isVertical)
     elif item['type'] == c.ENEMY_TYPE_PIRANHA:
-        sprite = Piranha(item['x'], item['y'], dir, color,
+        sprite = Piranha(level.context, item['x'], item['y'], dir, color,
             in_range, range_start, range_end)
     elif item['type'] == c.ENEMY_TYPE_FIRE_KOOPA:
-        sprite = FireKoopa(item['x'], item['y'], dir, color,
+        sprite = FireKoopa(level.context, item['x'], item['y'], dir, color,
             in_range, range_start, range_end, level)
     elif item['type'] == c.ENEMY_TYPE_FIRESTICK:
         '''use a number of fireballs to stimulate a firestick'''
@@ -41,7 +41,7 @@ def create_enemy(item, level):
         center_x, center_y = item['x'], item['y']
         for i in range(num):
             radius = i * 21 # 8 * 2.69 = 21
-            sprite.append(FireStick(center_x, center_y, dir, color,
+            sprite.append(FireStick(level.context, center_x, center_y, dir, color,
                 radius))
     return sprite
     
@@ -71,10 +71,10 @@ class Enemy(pg.sprite.Sprite):
         self.set_velocity()
         self.death_timer = 0
     
-    def load_frames(self, sheet, frame_rect_list):
+    def load_frames(self, sheet, frame_rect_list, flip_x=False, flip_y=False):
         for frame_rect in frame_rect_list:
             self.frames.append(tools.get_image(sheet, *frame_rect, 
-                            c.BLACK, c.SIZE_MULTIPLIER))
+                            c.BLACK, c.SIZE_MULTIPLIER, flip_x, flip_y))
 
     def set_velocity(self):
         if self.isVertical:
@@ -183,7 +183,7 @@ class Enemy(pg.sprite.Sprite):
                 self.rect.right = self.range_end
                 self.change_direction(c.LEFT)
         else:
-            collider = pg.sprite.spritecollideany(self, level.ground_step_pipe_group)
+            collider = level.ground_step_pipe_group.collideany(self)
             if collider:
                 if self.direction == c.RIGHT:
                     self.rect.right = collider.rect.left
@@ -213,11 +213,9 @@ class Enemy(pg.sprite.Sprite):
     def check_y_collisions(self, level):
         # decrease runtime delay: when enemey is on the ground, don't check brick and box
         if self.rect.bottom >= c.GROUND_HEIGHT:
-            sprite_group = level.ground_step_pipe_group
+            sprite = level.ground_step_pipe_group.collideany(self)
         else:
-            sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+            sprite = level.solid_world.collideany(self)
         if sprite and sprite.name != c.MAP_SLIDER:
             if self.rect.top <= sprite.rect.top:
                 self.rect.bottom = sprite.rect.y
@@ -226,17 +224,16 @@ class Enemy(pg.sprite.Sprite):
         level.check_is_falling(self)
 
 class Goomba(Enemy):
-    def __init__(self, x, y, direction, color, in_range,
+    def __init__(self, context, x, y, direction, color, in_range,
                 range_start, range_end, name=c.GOOMBA):
         Enemy.__init__(self)
         frame_rect_list = self.get_frame_rect(color)
-        self.setup_enemy(x, y, direction, name, setup.GFX[c.ENEMY_SHEET],
+        self.setup_enemy(x, y, direction, name, context.gfx[c.ENEMY_SHEET],
                     frame_rect_list, in_range, range_start, range_end)
         # dead jump image
-        self.frames.append(pg.transform.flip(self.frames[2], False, True))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list[2:3], flip_y=True)
         # right walk images
-        self.frames.append(pg.transform.flip(self.frames[0], True, False))
-        self.frames.append(pg.transform.flip(self.frames[1], True, False))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list[0:2], flip_x=True)
 
     def get_frame_rect(self, color):
         if color == c.COLOR_TYPE_GREEN:
@@ -256,17 +253,16 @@ class Goomba(Enemy):
             self.kill()
 
 class Koopa(Enemy):
-    def __init__(self, x, y, direction, color, in_range,
+    def __init__(self, context, x, y, direction, color, in_range,
                 range_start, range_end, name=c.KOOPA):
         Enemy.__init__(self)
         frame_rect_list = self.get_frame_rect(color)
-        self.setup_enemy(x, y, direction, name, setup.GFX[c.ENEMY_SHEET],
+        self.setup_enemy(x, y, direction, name, context.gfx[c.ENEMY_SHEET],
                     frame_rect_list, in_range, range_start, range_end)
         # dead jump image
-        self.frames.append(pg.transform.flip(self.frames[2], False, True))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list[2:3], flip_y=True)
         # right walk images
-        self.frames.append(pg.transform.flip(self.frames[0], True, False))
-        self.frames.append(pg.transform.flip(self.frames[1], True, False))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list[0:2], flip_x=True)
 
     def get_frame_rect(self, color):
         if color == c.COLOR_TYPE_GREEN:
@@ -291,17 +287,16 @@ class Koopa(Enemy):
         self.in_range = False
 
 class FlyKoopa(Enemy):
-    def __init__(self, x, y, direction, color, in_range, 
+    def __init__(self, context, x, y, direction, color, in_range, 
                 range_start, range_end, isVertical, name=c.FLY_KOOPA):
         Enemy.__init__(self)
         frame_rect_list = self.get_frame_rect(color)
-        self.setup_enemy(x, y, direction, name, setup.GFX[c.ENEMY_SHEET], 
+        self.setup_enemy(x, y, direction, name, context.gfx[c.ENEMY_SHEET], 
                     frame_rect_list, in_range, range_start, range_end, isVertical)
         # dead jump image
-        self.frames.append(pg.transform.flip(self.frames[2], False, True))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list[2:3], flip_y=True)
         # right walk images
-        self.frames.append(pg.transform.flip(self.frames[0], True, False))
-        self.frames.append(pg.transform.flip(self.frames[1], True, False))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list[0:2], flip_x=True)
         self.state = c.FLY
 
     def get_frame_rect(self, color):
@@ -325,28 +320,25 @@ class FlyKoopa(Enemy):
         self.isVertical = False
 
 class FireKoopa(Enemy):
-    def __init__(self, x, y, direction, color, in_range,
+    def __init__(self, context, x, y, direction, color, in_range,
                 range_start, range_end, level, name=c.FIRE_KOOPA):
         Enemy.__init__(self)
         frame_rect_list = [(2, 210, 32, 32), (42, 210, 32, 32),
                             (82, 210, 32, 32), (122, 210, 32, 32)]
-        self.setup_enemy(x, y, direction, name, setup.GFX[c.ENEMY_SHEET], 
+        self.setup_enemy(x, y, direction, name, context.gfx[c.ENEMY_SHEET], 
                     frame_rect_list, in_range, range_start, range_end)
         # right walk images
-        self.frames.append(pg.transform.flip(self.frames[0], True, False))
-        self.frames.append(pg.transform.flip(self.frames[1], True, False))
-        self.frames.append(pg.transform.flip(self.frames[2], True, False))
-        self.frames.append(pg.transform.flip(self.frames[3], True, False))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list, flip_x=True)
         self.x_vel = 0
         self.gravity = 0.3
         self.level = level
         self.fire_timer = 0
         self.jump_timer = 0
 
-    def load_frames(self, sheet, frame_rect_list):
+    def load_frames(self, sheet, frame_rect_list, flip_x=False, flip_y=False):
         for frame_rect in frame_rect_list:
             self.frames.append(tools.get_image(sheet, *frame_rect,
-                            c.BLACK, c.BRICK_SIZE_MULTIPLIER))
+                            c.BLACK, c.BRICK_SIZE_MULTIPLIER, flip_x, flip_y))
 
     def walking(self):
         if (self.current_time - self.animate_timer) > 250:
@@ -379,25 +371,22 @@ class FireKoopa(Enemy):
     def shoot_fire(self):
         if (self.current_time - self.fire_timer) > 3000:
             self.fire_timer = self.current_time
-            self.level.enemy_group.add(Fire(self.rect.x, self.rect.bottom-20, self.direction))
+            self.level.enemy_group.add(Fire(self.level.context, self.rect.x, self.rect.bottom-20, self.direction))
 
 class Fire(Enemy):
-    def __init__(self, x, y, direction, name=c.FIRE):
+    def __init__(self, context, x, y, direction, name=c.FIRE):
         Enemy.__init__(self)
         frame_rect_list = [(101, 253, 23, 8), (131, 253, 23, 8)]
         in_range, range_start, range_end = False, 0, 0
-        self.setup_enemy(x, y, direction, name, setup.GFX[c.ENEMY_SHEET], 
+        self.setup_enemy(x, y, direction, name, context.gfx[c.ENEMY_SHEET], 
                     frame_rect_list, in_range, range_start, range_end)
         # right images
-        self.frames.append(pg.transform.flip(self.frames[0], True, False))
-        self.frames.append(pg.transform.flip(self.frames[1], True, False))
+        self.load_frames(context.gfx[c.ENEMY_SHEET], frame_rect_list, flip_x=True)
         self.state = c.FLY
         self.x_vel = 5 if self.direction == c.RIGHT else -5
 
     def check_x_collisions(self, level):
-        sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+        sprite = level.solid_world.collideany(self)
         if sprite:
             self.kill()
 
@@ -405,11 +394,11 @@ class Fire(Enemy):
         self.kill()
 
 class Piranha(Enemy):
-    def __init__(self, x, y, direction, color, in_range, 
+    def __init__(self, context, x, y, direction, color, in_range, 
                 range_start, range_end, name=c.PIRANHA):
         Enemy.__init__(self)
         frame_rect_list = self.get_frame_rect(color)
-        self.setup_enemy(x, y, direction, name, setup.GFX[c.ENEMY_SHEET], 
+        self.setup_enemy(x, y, direction, name, context.gfx[c.ENEMY_SHEET], 
                     frame_rect_list, in_range, range_start, range_end)
         self.state = c.REVEAL
         self.y_vel = 1
@@ -463,7 +452,7 @@ class Piranha(Enemy):
         self.kill()
 
 class FireStick(pg.sprite.Sprite):
-    def __init__(self, center_x, center_y, direction, color, radius, name=c.FIRESTICK):
+    def __init__(self, context, center_x, center_y, direction, color, radius, name=c.FIRESTICK):
         '''the firestick will rotate around the center of a circle'''
         pg.sprite.Sprite.__init__(self)
 
@@ -473,7 +462,7 @@ class FireStick(pg.sprite.Sprite):
         self.name = name
         rect_list = [(96, 144, 8, 8), (104, 144, 8, 8),
                     (96, 152, 8, 8), (104, 152, 8, 8)]
-        self.load_frames(setup.GFX[c.ITEM_SHEET], rect_list)
+        self.load_frames(context.gfx[c.ITEM_SHEET], rect_list)
         self.animate_timer = 0
         self.image = self.frames[self.frame_index]
         self.rect = self.image.get_rect()
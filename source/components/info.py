@@ -1,7 +1,7 @@
 __author__ = 'marble_xu'
 
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 from . import coin
 
@@ -12,7 +12,8 @@ class Character(pg.sprite.Sprite):
         self.rect = self.image.get_rect()
         
 class Info():
-    def __init__(self, game_info, state):
+    def __init__(self, context, game_info, state):
+        self.context = context
         self.coin_total = game_info[c.COIN_TOTAL]
         self.total_lives = game_info[c.LIVES]
         self.state = state
@@ -21,7 +22,7 @@ class Info():
         self.create_font_image_dict()
         self.create_info_labels()
         self.create_state_labels()
-        self.flashing_coin = coin.FlashCoin(280, 53)
+        self.flashing_coin = coin.FlashCoin(context, 280, 53)
         
     def create_font_image_dict(self):
         self.image_dict = {}
@@ -48,7 +49,7 @@ class Info():
         character_string = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ -*'
         
         for character, image_rect in zip(character_string, image_rect_list):
-            self.image_dict[character] = tools.get_image(setup.GFX['text_images'], 
+            self.image_dict[character] = tools.get_image(self.context.gfx['text_images'], 
                                             *image_rect, (92, 148, 252), 2.9)
 
     def create_info_labels(self):
@@ -83,7 +84,7 @@ class Info():
             self.create_time_out_labels()
 
     def create_player_image(self):
-        self.life_times_image = tools.get_image(setup.GFX['text_images'], 
+        self.life_times_image = tools.get_image(self.context.gfx['text_images'], 
                                 75, 247, 6, 6, (92, 148, 252), 2.9)
         self.life_times_rect = self.life_times_image.get_rect(center=(378, 295))
         self.life_total_label = []
@@ -93,7 +94,7 @@ class Info():
             rect = (178, 32, 12, 16)
         else:
             rect = (178, 128, 12, 16)
-        self.player_image = tools.get_image(setup.GFX['mario_bros'], 
+        self.player_image = tools.get_image(self.context.gfx['mario_bros'], 
                                 *rect, (92, 148, 252), 2.9)
         self.player_rect = self.player_image.get_rect(center=(320, 290))
 
@@ -183,16 +184,14 @@ class Info():
             index -= 1
         
     def draw(self, surface):
-        self.draw_info(surface, self.state_labels)
-        if self.state == c.LOAD_SCREEN:
-            surface.blit(self.player_image, self.player_rect)
-            surface.blit(self.life_times_image, self.life_times_rect)
-        surface.blit(self.flashing_coin.image, self.flashing_coin.rect)
-    
-    def draw_info(self, surface, label_list):
-        for label in label_list:
-            for letter in label:
-                surface.blit(letter.image, letter.rect)
-
-
+        surface.blits(self.get_blit_list(), False)
 
+    def get_blit_list(self):
+        '''return the (image, rect) pairs drawn by this info, in draw order'''
+        blit_list = [(letter.image, letter.rect) for label in self.state_labels
+                        for letter in label]
+        if self.state == c.LOAD_SCREEN:
+            blit_list.append((self.player_image, self.player_rect))
+            blit_list.append((self.life_times_image, self.life_times_rect))
+        blit_list.append((self.flashing_coin.image, self.flashing_coin.rect))
+        return blit_list
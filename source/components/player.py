@@ -1,15 +1,15 @@
 __author__ = 'marble_xu'
 
-import os
-import json
 import pygame as pg
-from .. import setup, tools
+from .. import tools, repository
 from .. import constants as c
 from ..components import powerup
 
 class Player(pg.sprite.Sprite):
-    def __init__(self, player_name):
+    def __init__(self, context, player_name):
         pg.sprite.Sprite.__init__(self)
+        self.context = context
+        self.keybinding = context.keybinding
         self.player_name = player_name
         self.load_data()
         self.setup_timer()
@@ -40,10 +40,7 @@ class Player(pg.sprite.Sprite):
         self.state = c.STAND
 
     def load_data(self):
-        player_file = str(self.player_name) + '.json'
-        file_path = os.path.join('source', 'data', 'player', player_file)
-        f = open(file_path)
-        self.player_data = json.load(f)
+        self.player_data = repository.load_player(self.player_name)
 
     def setup_timer(self):
         self.walking_timer = 0
@@ -82,7 +79,7 @@ class Player(pg.sprite.Sprite):
         self.x_accel = self.walk_accel
 
     def load_images(self):
-        sheet = setup.GFX['mario_bros']
+        sheet = self.context.gfx['mario_bros']
         frames_list = self.player_data[c.PLAYER_FRAMES]
 
         self.right_frames = []
@@ -97,7 +94,9 @@ class Player(pg.sprite.Sprite):
         
         for name, frames in frames_list.items():
             for frame in frames:
-                image = tools.get_image(sheet, frame['x'], frame['y'], 
+                # player images get their alpha changed when flashing,
+                # so they are not shared through the frame cache
+                image = tools.cut_image(sheet, frame['x'], frame['y'], 
                                     frame['width'], frame['height'],
                                     c.BLACK, c.SIZE_MULTIPLIER)
                 left_image = pg.transform.flip(image, True, False)
@@ -171,11 +170,11 @@ class Player(pg.sprite.Sprite):
                 self.state = c.STAND
 
     def check_to_allow_jump(self, keys):
-        if not keys[tools.keybinding['jump']]:
+        if not keys[self.keybinding['jump']]:
             self.allow_jump = True
     
     def check_to_allow_fireball(self, keys):
-        if not keys[tools.keybinding['action']]:
+        if not keys[self.keybinding['action']]:
             self.allow_fireball = True
 
     def standing(self, keys, fire_group):
@@ -186,27 +185,27 @@ class Player(pg.sprite.Sprite):
         self.x_vel = 0
         self.y_vel = 0
         
-        if keys[tools.keybinding['action']]:
+        if keys[self.keybinding['action']]:
             if self.fire and self.allow_fireball:
                 self.shoot_fireball(fire_group)
 
-        if keys[tools.keybinding['down']]:
+        if keys[self.keybinding['down']]:
             self.update_crouch_or_not(True)
 
-        if keys[tools.keybinding['left']]:
+        if keys[self.keybinding['left']]:
             self.facing_right = False
             self.update_crouch_or_not()
             self.state = c.WALK
-        elif keys[tools.keybinding['right']]:
+        elif keys[self.keybinding['right']]:
             self.facing_right = True
             self.update_crouch_or_not()
             self.state = c.WALK
-        elif keys[tools.keybinding['jump']]:
+        elif keys[self.keybinding['jump']]:
             if self.allow_jump:
                 self.state = c.JUMP
                 self.y_vel = self.jump_vel
         
-        if not keys[tools.keybinding['down']]:
+        if not keys[self.keybinding['down']]:
             self.update_crouch_or_not()
 
     def update_crouch_or_not(self, isDown=False):
@@ -244,7 +243,7 @@ class Player(pg.sprite.Sprite):
                 self.frame_index = 1
             self.walking_timer = self.current_time
         
-        if keys[tools.keybinding['action']]:
+        if keys[self.keybinding['action']]:
             self.max_x_vel = self.max_run_vel
             self.x_accel = self.run_accel
             if self.fire and self.allow_fireball:
@@ -253,7 +252,7 @@ class Player(pg.sprite.Sprite):
             self.max_x_vel = self.max_walk_vel
             self.x_accel = self.walk_accel
         
-        if keys[tools.keybinding['jump']]:
+        if keys[self.keybinding['jump']]:
             if self.allow_jump:
                 self.state = c.JUMP
                 if abs(self.x_vel) > 4:
@@ -262,14 +261,14 @@ class Player(pg.sprite.Sprite):
                     self.y_vel = self.jump_vel
                 
 
-        if keys[tools.keybinding['left']]:
+        if keys[self.keybinding['left']]:
             self.facing_right = False
             if self.x_vel > 0:
                 self.frame_index = 5
                 self.x_accel = c.SMALL_TURNAROUND
             
             self.x_vel = self.cal_vel(self.x_vel, self.max_x_vel, self.x_accel, True)
-        elif keys[tools.keybinding['right']]:
+        elif keys[self.keybinding['right']]:
             self.facing_right = True
             if self.x_vel < 0:
                 self.frame_index = 5
@@ -303,16 +302,16 @@ class Player(pg.sprite.Sprite):
             self.gravity = c.GRAVITY
             self.state = c.FALL
 
-        if keys[tools.keybinding['right']]:
+        if keys[self.keybinding['right']]:
             self.x_vel = self.cal_vel(self.x_vel, self.max_x_vel, self.x_accel)
-        elif keys[tools.keybinding['left']]:
+        elif keys[self.keybinding['left']]:
             self.x_vel = self.cal_vel(self.x_vel, self.max_x_vel, self.x_accel, True)
         
-        if not keys[tools.keybinding['jump']]:
+        if not keys[self.keybinding['jump']]:
             self.gravity = c.GRAVITY
             self.state = c.FALL
         
-        if keys[tools.keybinding['action']]:
+        if keys[self.keybinding['action']]:
             if self.fire and self.allow_fireball:
                 self.shoot_fireball(fire_group)
 
@@ -320,12 +319,12 @@ class Player(pg.sprite.Sprite):
         self.check_to_allow_fireball(keys)
         self.y_vel = self.cal_vel(self.y_vel, self.max_y_vel, self.gravity)
         
-        if keys[tools.keybinding['right']]:
+        if keys[self.keybinding['right']]:
             self.x_vel = self.cal_vel(self.x_vel, self.max_x_vel, self.x_accel)
-        elif keys[tools.keybinding['left']]:
+        elif keys[self.keybinding['left']]:
             self.x_vel = self.cal_vel(self.x_vel, self.max_x_vel, self.x_accel, True)
         
-        if keys[tools.keybinding['action']]:
+        if keys[self.keybinding['action']]:
             if self.fire and self.allow_fireball:
                 self.shoot_fireball(fire_group)
     
@@ -363,7 +362,7 @@ class Player(pg.sprite.Sprite):
     def shoot_fireball(self, powerup_group):
         if (self.current_time - self.last_fireball_time) > 500:
             self.allow_fireball = False
-            powerup_group.add(powerup.FireBall(self.rect.right, 
+            powerup_group.add(powerup.FireBall(self.context, self.rect.right, 
                             self.rect.y, self.facing_right))
             self.last_fireball_time = self.current_time
             self.frame_index = 6
@@ -1,7 +1,7 @@
 __author__ = 'marble_xu'
 
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 from . import stuff
 
@@ -31,9 +31,7 @@ class Powerup(stuff.Stuff):
             self.kill()
 
     def check_x_collisions(self, level):
-        sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+        sprite = level.solid_world.collideany(self)
         if sprite:
             if self.direction == c.RIGHT:
                 self.rect.right = sprite.rect.left-1
@@ -46,10 +44,7 @@ class Powerup(stuff.Stuff):
                 self.x_vel = 0
     
     def check_y_collisions(self, level):
-        sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+        sprite = level.solid_world.collideany(self)
         if sprite:
             self.y_vel = 0
             self.rect.bottom = sprite.rect.top
@@ -60,8 +55,8 @@ class Powerup(stuff.Stuff):
         self.image = self.frames[self.frame_index]
 
 class Mushroom(Powerup):
-    def __init__(self, x, y):
-        Powerup.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+    def __init__(self, context, x, y):
+        Powerup.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                 [(0, 0, 16, 16)], c.SIZE_MULTIPLIER)
         self.type = c.TYPE_MUSHROOM
         self.speed = 2
@@ -84,17 +79,17 @@ class Mushroom(Powerup):
         self.animation()
 
 class LifeMushroom(Mushroom):
-    def __init__(self, x, y):
-        Powerup.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+    def __init__(self, context, x, y):
+        Powerup.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                 [(16, 0, 16, 16)], c.SIZE_MULTIPLIER)
         self.type = c.TYPE_LIFEMUSHROOM
         self.speed = 2
 
 class FireFlower(Powerup):
-    def __init__(self, x, y):
+    def __init__(self, context, x, y):
         frame_rect_list = [(0, 32, 16, 16), (16, 32, 16, 16),
                         (32, 32, 16, 16), (48, 32, 16, 16)]
-        Powerup.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+        Powerup.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                     frame_rect_list, c.SIZE_MULTIPLIER)
         self.type = c.TYPE_FIREFLOWER
 
@@ -117,10 +112,10 @@ class FireFlower(Powerup):
         self.animation()
 
 class Star(Powerup):
-    def __init__(self, x, y):
+    def __init__(self, context, x, y):
         frame_rect_list = [(1, 48, 15, 16), (17, 48, 15, 16),
                         (33, 48, 15, 16), (49, 48, 15, 16)]
-        Powerup.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+        Powerup.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                     frame_rect_list, c.SIZE_MULTIPLIER)
         self.type = c.TYPE_STAR
         self.gravity = .4
@@ -150,10 +145,7 @@ class Star(Powerup):
         self.animation()
     
     def check_y_collisions(self, level):
-        sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+        sprite = level.solid_world.collideany(self)
 
         if sprite:
             if self.rect.top > sprite.rect.top:
@@ -163,13 +155,13 @@ class Star(Powerup):
                 self.y_vel = -5
                 
 class FireBall(Powerup):
-    def __init__(self, x, y, facing_right):
+    def __init__(self, context, x, y, facing_right):
         # first 3 Frames are flying, last 4 frams are exploding
         frame_rect_list = [(96, 144, 8, 8), (104, 144, 8, 8), 
                         (96, 152, 8, 8), (104, 152, 8, 8),
                         (112, 144, 16, 16), (112, 160, 16, 16),
                         (112, 176, 16, 16)]
-        Powerup.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+        Powerup.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                     frame_rect_list, c.SIZE_MULTIPLIER)
         self.type = c.TYPE_FIREBALL
         self.y_vel = 10
@@ -207,17 +199,12 @@ class FireBall(Powerup):
         self.animation()
     
     def check_x_collisions(self, level):
-        sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+        sprite = level.solid_world.collideany(self)
         if sprite:
             self.change_to_explode()
     
     def check_y_collisions(self, level):
-        sprite_group = pg.sprite.Group(level.ground_step_pipe_group,
-                            level.brick_group, level.box_group)
-
-        sprite = pg.sprite.spritecollideany(self, sprite_group)
+        sprite = level.solid_world.collideany(self)
         enemy = pg.sprite.spritecollideany(self, level.enemy_group)
         if sprite:
             if self.rect.top > sprite.rect.top:
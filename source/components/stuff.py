@@ -1,31 +1,29 @@
 __author__ = 'marble_xu'
 
 import pygame as pg
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
 
 class Collider(pg.sprite.Sprite):
+    """
+    An invisible rect of the level, a ground or a step. It has no image and is never
+    drawn, with c.DEBUG the level draws its outline (see Level.draw_outlines).
+    """
+    __slots__ = ['rect', 'name']
+
     def __init__(self, x, y, width, height, name):
         pg.sprite.Sprite.__init__(self)
-        self.image = pg.Surface((width, height)).convert()
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.rect = pg.Rect(x, y, width, height)
         self.name = name
-        if c.DEBUG:
-            self.image.fill(c.RED)
 
-class Checkpoint(pg.sprite.Sprite):
+class Checkpoint(Collider):
+    __slots__ = ['type', 'enemy_groupid', 'map_index']
+
     def __init__(self, x, y, width, height, type, enemy_groupid=0, map_index=0, name=c.MAP_CHECKPOINT):
-        pg.sprite.Sprite.__init__(self)
-        self.image = pg.Surface((width, height))
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        Collider.__init__(self, x, y, width, height, name)
         self.type = type
         self.enemy_groupid = enemy_groupid
         self.map_index = map_index
-        self.name = name
 
 class Stuff(pg.sprite.Sprite):
     def __init__(self, x, y, sheet, image_rect_list, scale):
@@ -45,18 +43,18 @@ class Stuff(pg.sprite.Sprite):
         pass
 
 class Pole(Stuff):
-    def __init__(self, x, y):
-        Stuff.__init__(self, x, y, setup.GFX['tile_set'],
+    def __init__(self, context, x, y):
+        Stuff.__init__(self, x, y, context.gfx['tile_set'],
                 [(263, 144, 2, 16)], c.BRICK_SIZE_MULTIPLIER)
 
 class PoleTop(Stuff):
-    def __init__(self, x, y):
-        Stuff.__init__(self, x, y, setup.GFX['tile_set'],
+    def __init__(self, context, x, y):
+        Stuff.__init__(self, x, y, context.gfx['tile_set'],
                 [(228, 120, 8, 8)], c.BRICK_SIZE_MULTIPLIER)
 
 class Flag(Stuff):
-    def __init__(self, x, y):
-        Stuff.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+    def __init__(self, context, x, y):
+        Stuff.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                 [(128, 32, 16, 16)], c.SIZE_MULTIPLIER)
         self.state = c.TOP_OF_POLE
         self.y_vel = 5
@@ -68,8 +66,8 @@ class Flag(Stuff):
                 self.state = c.BOTTOM_OF_POLE
 
 class CastleFlag(Stuff):
-    def __init__(self, x, y):
-        Stuff.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+    def __init__(self, context, x, y):
+        Stuff.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                 [(129, 2, 14, 14)], c.SIZE_MULTIPLIER)
         self.y_vel = -2
         self.target_height = y
@@ -85,16 +83,16 @@ class Digit(pg.sprite.Sprite):
         self.rect = self.image.get_rect()
 
 class Score():
-    def __init__(self, x, y, score):
+    def __init__(self, context, x, y, score):
         self.x = x
         self.y = y
         self.y_vel = -3
-        self.create_images_dict()
+        self.create_images_dict(context.gfx[c.ITEM_SHEET])
         self.score = score
         self.create_score_digit()
         self.distance = 130 if self.score == 1000 else 75
         
-    def create_images_dict(self):
+    def create_images_dict(self, sheet):
         self.image_dict = {}
         digit_rect_list = [(1, 168, 3, 8), (5, 168, 3, 8),
                             (8, 168, 4, 8), (0, 0, 0, 0),
@@ -103,7 +101,7 @@ class Score():
                             (20, 168, 4, 8), (0, 0, 0, 0)]
         digit_string = '0123456789'
         for digit, image_rect in zip(digit_string, digit_rect_list):
-            self.image_dict[digit] = tools.get_image(setup.GFX[c.ITEM_SHEET],
+            self.image_dict[digit] = tools.get_image(sheet,
                                     *image_rect, c.BLACK, c.BRICK_SIZE_MULTIPLIER)
     
     def create_score_digit(self):
@@ -130,12 +128,12 @@ class Score():
 
 
 class Pipe(Stuff):
-    def __init__(self, x, y, width, height, type, name=c.MAP_PIPE):
+    def __init__(self, context, x, y, width, height, type, name=c.MAP_PIPE):
         if type == c.PIPE_TYPE_HORIZONTAL:
             rect = [(32, 128, 37, 30)]
         else:
             rect = [(0, 160, 32, 30)]
-        Stuff.__init__(self, x, y, setup.GFX['tile_set'],
+        Stuff.__init__(self, x, y, context.gfx['tile_set'],
                 rect, c.BRICK_SIZE_MULTIPLIER)
         self.name = name
         self.type = type
@@ -169,8 +167,8 @@ class Pipe(Stuff):
         return False
 
 class Slider(Stuff):
-    def __init__(self, x, y, num, direction, range_start, range_end, vel, name=c.MAP_SLIDER):
-        Stuff.__init__(self, x, y, setup.GFX[c.ITEM_SHEET],
+    def __init__(self, context, x, y, num, direction, range_start, range_end, vel, name=c.MAP_SLIDER):
+        Stuff.__init__(self, x, y, context.gfx[c.ITEM_SHEET],
                 [(64, 128, 15, 8)], 2.8)
         self.name = name
         self.create_image(x, y, num)
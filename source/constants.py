@@ -88,6 +88,7 @@ ENEMY_TYPE_FLY_KOOPA = 2
 ENEMY_TYPE_PIRANHA = 3
 ENEMY_TYPE_FIRESTICK = 4
 ENEMY_TYPE_FIRE_KOOPA = 5
+ENEMY_TYPE_FIRE = 6 # the fire of a fire koopa, not used in the map files
 ENEMY_RANGE = 'range'
 MAP_CHECKPOINT = 'checkpoint'
 ENEMY_GROUPID = 'enemy_groupid'
@@ -0,0 +1,40 @@
+"""
+The context of a game instance: everything the states and sprites of one game take
+from outside, passed to them explicitly instead of read from module globals.
+
+Many levels can run side by side in one process, each with its own context, while
+sharing one graphics store. The graphics must be treated as read only.
+"""
+
+import pygame as pg
+from . import tools
+from . import constants as c
+
+class GameContext():
+    """
+    Attributes:
+        gfx (Graphics): The sprite sheets and backgrounds, keyed by file name.
+        screen_rect (Rect): The size of the screen, the viewport of a level.
+        keybinding (dict): The key code of each player action, see tools.keybinding.
+            A given dict is used as it is, by default the context has its own copy.
+    """
+
+    def __init__(self, gfx, screen_rect=None, keybinding=None):
+        self.gfx = gfx
+        if screen_rect is None:
+            screen_rect = ((0, 0), c.SCREEN_SIZE)
+        self.screen_rect = pg.Rect(screen_rect)
+        if keybinding is None:
+            keybinding = dict(tools.keybinding)
+        self.keybinding = keybinding
+
+default_context = None
+
+def get_default_context():
+    '''return the context of the graphics and screen of source.setup and tools.keybinding'''
+    global default_context
+    if default_context is None:
+        from . import setup
+        setup.init()
+        default_context = GameContext(setup.GFX, setup.SCREEN_RECT, tools.keybinding)
+    return default_context
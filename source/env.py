@@ -0,0 +1,277 @@
+"""
+A reinforcement learning environment around a single level, in the style of gym.
+
+    env = MarioEnv()
+    observation = env.reset(level_num=1)
+    while True:
+        action = replay.make_mask('right', 'action')
+        observation, reward, done, info = env.step(action, repeat=4)
+        if done:
+            break
+
+The environment drives Level.update_all_sprites directly with a fixed step clock
+and no window is needed. Only the pixel observation draws, and only the last frame
+of a step. Each environment plays its own levels through a GameContext, so many
+environments can run in one process. Without a context the environment uses the
+default one, which initializes source.setup, so call setup.init(headless=True)
+or set SDL_VIDEODRIVER to 'dummy' first to run without a display. Pixel and state observations need numpy.
+"""
+
+import pygame as pg
+from . import constants as c
+
+# the kind of each entry of a state observation, KIND_NONE marks the unused entries
+KIND_NONE = 0
+KIND_PLAYER = 1
+KIND_ENEMY = 2
+KIND_SHELL = 3
+KIND_POWERUP = 4
+KIND_COIN = 5
+
+# the flags of a state observation entry
+FLAG_BIG = 1
+FLAG_FIRE = 2
+FLAG_INVINCIBLE = 4
+FLAG_HURT_INVINCIBLE = 8
+FLAG_RIGHT = 16
+
+STATE_DTYPE = [('kind', 'u1'), ('type', 'i1'), ('state', 'u1'), ('flags', 'u1'),
+               ('x', 'i2'), ('y', 'i2'), ('w', 'i2'), ('h', 'i2'),
+               ('x_vel', 'f4'), ('y_vel', 'f4')]
+
+# the code of a sprite state is its index in this list plus one, 0 is any other state
+STATE_LIST = [c.STAND, c.WALK, c.JUMP, c.FALL, c.FLY, c.SMALL_TO_BIG, c.BIG_TO_FIRE,
+              c.BIG_TO_SMALL, c.FLAGPOLE, c.WALK_AUTO, c.END_OF_LEVEL_FALL, c.IN_CASTLE,
+              c.DOWN_TO_PIPE, c.UP_OUT_PIPE, c.JUMPED_ON, c.DEATH_JUMP, c.SHELL_SLIDE,
+              c.REVEAL, c.SLIDE, c.RESTING, c.BUMPED, c.OPENED, c.FLYING, c.BOUNCING,
+              c.EXPLODING]
+STATE_CODES = {state: i + 1 for i, state in enumerate(STATE_LIST)}
+
+ENEMY_TYPES = {c.GOOMBA: c.ENEMY_TYPE_GOOMBA,
+               c.KOOPA: c.ENEMY_TYPE_KOOPA,
+               c.FLY_KOOPA: c.ENEMY_TYPE_FLY_KOOPA,
+               c.PIRANHA: c.ENEMY_TYPE_PIRANHA,
+               c.FIRESTICK: c.ENEMY_TYPE_FIRESTICK,
+               c.FIRE_KOOPA: c.ENEMY_TYPE_FIRE_KOOPA,
+               c.FIRE: c.ENEMY_TYPE_FIRE}
+
+class PixelObservation():
+    """
+    The viewport of a level as a numpy array of shape (height, width, 3), or
+    (height, width) in grayscale.
+
+    The level is drawn into a surface which shares its pixels with a numpy array, so
+    the rgb observation is a view and no pixels are copied. Downsampling by an integer
+    factor takes every factor-th pixel and is a view too. The grayscale observation
+    is computed into a buffer which is reused, so it is not allocated each frame.
+
+    The returned array is overwritten by the next observation, copy it to keep it.
+    """
+
+    def __init__(self, width, height, grayscale=False, downsample=1):
+        import numpy as np
+        self.np = np
+        # pixels are stored as bytes B, G, R, A, like the display surfaces
+        self.buffer = np.zeros((height, width, 4), np.uint8)
+        self.surface = pg.image.frombuffer(self.buffer, (width, height), 'BGRA')
+        self.rgb = self.buffer[::downsample, ::downsample, 2::-1]
+        self.grayscale = grayscale
+        if grayscale:
+            shape = self.rgb.shape[:2]
+            self.gray = np.empty(shape, np.uint8)
+            self.sum = np.empty(shape, np.uint16)
+            self.channel = np.empty(shape, np.uint16)
+
+    def observe(self, level):
+        level.draw_level(self.surface, level.get_blit_list())
+        if not self.grayscale:
+            return self.rgb
+        # luma with integer weights, (77 R + 150 G + 29 B) / 256
+        np, total, channel = self.np, self.sum, self.channel
+        np.multiply(self.rgb[:, :, 0], 77, out=total, dtype=np.uint16)
+        np.multiply(self.rgb[:, :, 1], 150, out=channel, dtype=np.uint16)
+        total += channel
+        np.multiply(self.rgb[:, :, 2], 29, out=channel, dtype=np.uint16)
+        total += channel
+        total >>= 8
+        self.gray[...] = total
+        return self.gray
+
+class StateObservation():
+    """
+    The player and the enemies, shells, powerups and coins near the viewport as a
+    numpy structured array of STATE_DTYPE with a fixed number of entries.
+
+    The first entry is the player, its type is -1. The type of the other entries is
+    a c.ENEMY_TYPE_* constant for enemies and shells, and a c.TYPE_* constant for
+    powerups and coins. Positions are relative to the viewport. Sprites beyond the
+    capacity are left out, the unused entries are all zero (KIND_NONE).
+
+    The array is reused, it is overwritten by the next observation.
+    """
+
+    def __init__(self, capacity=64, margin=c.SCREEN_WIDTH // 4):
+        import numpy as np
+        self.array = np.zeros(capacity, STATE_DTYPE)
+        self.count = 0
+        self.margin = margin
+
+    def observe(self, level):
+        array = self.array
+        capacity = len(array)
+        viewport = level.viewport
+        x, y = viewport.x, viewport.y
+        left, right = x - self.margin, viewport.right + self.margin
+
+        player = level.player
+        rect = player.rect
+        flags = ((FLAG_BIG if player.big else 0) | (FLAG_FIRE if player.fire else 0) |
+                (FLAG_INVINCIBLE if player.invincible else 0) |
+                (FLAG_HURT_INVINCIBLE if player.hurt_invincible else 0) |
+                (FLAG_RIGHT if player.facing_right else 0))
+        array[0] = (KIND_PLAYER, -1, STATE_CODES.get(player.state, 0), flags,
+                    rect.x - x, rect.y - y, rect.w, rect.h, player.x_vel, player.y_vel)
+        count = 1
+
+        for kind, group in ((KIND_ENEMY, level.enemy_group),
+                            (KIND_SHELL, level.shell_group),
+                            (KIND_POWERUP, level.powerup_group),
+                            (KIND_COIN, level.coin_group),
+                            (KIND_COIN, level.static_coin_group)):
+            for sprite in group:
+                rect = sprite.rect
+                if rect.right < left or rect.x > right:
+                    continue
+                if count == capacity:
+                    break
+                if kind == KIND_ENEMY or kind == KIND_SHELL:
+                    type = ENEMY_TYPES[sprite.name]
+                elif kind == KIND_POWERUP:
+                    type = sprite.type
+                else:
+                    type = c.TYPE_COIN
+                array[count] = (kind, type, STATE_CODES.get(getattr(sprite, 'state', None), 0),
+                            FLAG_RIGHT if getattr(sprite, 'direction', None) == c.RIGHT else 0,
+                            rect.x - x, rect.y - y, rect.w, rect.h,
+                            getattr(sprite, 'x_vel', 0), getattr(sprite, 'y_vel', 0))
+                count += 1
+
+        if count < self.count:
+            array[count:self.count] = 0
+        self.count = count
+        return array
+
+class MarioEnv():
+    """
+    Plays one level, an episode ends when the player dies or enters the castle.
+
+    An action is the bitmask of the pressed inputs, see replay.INPUT_LIST and
+    replay.make_mask. The observation is the player position and velocity, with
+    obs_type 'pixels' the viewport image, see PixelObservation, and with obs_type
+    'state' the player and the sprites around it, see StateObservation. The reward of a step is the gain of score, plus COIN_REWARD for
+    each coin, plus DEATH_REWARD when the player dies and FLAGPOLE_REWARD when the
+    player reaches the flagpole.
+
+    Attributes:
+        context (GameContext): The graphics, screen and keybinding of the levels.
+        level (Level): The level of the current episode.
+        frames (int): The number of frames played in the current episode.
+        flag_reached (bool): True once the player reached the flagpole.
+    """
+    COIN_REWARD = 0
+    DEATH_REWARD = -1000
+    FLAGPOLE_REWARD = 1000
+
+    def __init__(self, obs_type='player', grayscale=False, downsample=1, capacity=64,
+                context=None):
+        from . import replay
+        from .context import get_default_context
+        self.context = context or get_default_context()
+        self.decoder = replay.KeyDecoder(self.context.keybinding)
+        self.obs_type = obs_type
+        if obs_type == 'pixels':
+            width, height = self.context.screen_rect.size
+            self.pixels = PixelObservation(width, height, grayscale, downsample)
+        elif obs_type == 'state':
+            self.state = StateObservation(capacity)
+        elif obs_type != 'player':
+            raise ValueError('unknown observation type %s' % obs_type)
+        self.level = None
+        self.game_clock = None
+        self.frames = 0
+        self.flag_reached = False
+
+    def reset(self, level_num=1, player_name=c.PLAYER_MARIO):
+        '''start a new episode and return its first observation'''
+        from . import tools
+        from .states import level
+        # the same level each time, so that it is reset from its template, with a new
+        # player as a level keeps its player between startups
+        if self.level is None:
+            self.level = level.Level(self.context)
+        self.level.player = None
+        self.game_clock = tools.FixedStepClock()
+        self.frames = 0
+        self.flag_reached = False
+        game_info = {c.COIN_TOTAL: 0,
+                     c.SCORE: 0,
+                     c.LIVES: 1,
+                     c.TOP_SCORE: 0,
+                     c.CURRENT_TIME: 0.0,
+                     c.LEVEL_NUM: level_num,
+                     c.PLAYER_NAME: player_name}
+        self.level.startup(self.game_clock.next_frame(), game_info)
+        return self.get_observation()
+
+    def step(self, action, repeat=1):
+        '''play the action for repeat frames, return (observation, reward, done, info)'''
+        level = self.level
+        player = level.player
+        game_info = level.game_info
+        keys = self.decoder.get_keys(action)
+        score, coins = game_info[c.SCORE], game_info[c.COIN_TOTAL]
+
+        reward = 0
+        done = False
+        for _ in range(repeat):
+            game_info[c.CURRENT_TIME] = level.current_time = self.game_clock.next_frame()
+            level.update_all_sprites(keys)
+            self.frames += 1
+            if player.dead:
+                reward += self.DEATH_REWARD
+                done = True
+                break
+            if not self.flag_reached and player.state == c.FLAGPOLE:
+                reward += self.FLAGPOLE_REWARD
+                self.flag_reached = True
+            if player.state == c.IN_CASTLE:
+                done = True
+                break
+
+        reward += game_info[c.SCORE] - score
+        reward += (game_info[c.COIN_TOTAL] - coins) * self.COIN_REWARD
+        info = {'x': player.rect.x,
+                'score': game_info[c.SCORE],
+                'coins': game_info[c.COIN_TOTAL],
+                'time': level.overhead_info.time,
+                'dead': player.dead,
+                'flag': self.flag_reached,
+                'frames': self.frames}
+        return self.get_observation(), reward, done, info
+
+    def snapshot(self):
+        '''return a save state of the episode, to go back to it with restore'''
+        return (self.level.snapshot(), self.game_clock.frames, self.frames, self.flag_reached)
+
+    def restore(self, state):
+        level_state, self.game_clock.frames, self.frames, self.flag_reached = state
+        self.level.restore(level_state)
+        return self.get_observation()
+
+    def get_observation(self):
+        if self.obs_type == 'pixels':
+            return self.pixels.observe(self.level)
+        if self.obs_type == 'state':
+            return self.state.observe(self.level)
+        player = self.level.player
+        return (player.rect.x, player.rect.y, player.x_vel, player.y_vel)
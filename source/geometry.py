@@ -0,0 +1,157 @@
+"""
+Collision lookups of the simulation, in plain python without pygame.
+
+ColumnIndex is the column bucketed collision lookup behind spatial.ColumnGroup and
+IntervalIndex the x sorted one behind spatial.IntervalGroup. They only read x, y, w
+and h (and the properties derived from them) of the pg.Rect of the items they are
+given, so they need no pygame themselves.
+"""
+
+from bisect import bisect_left, insort
+
+COLUMN_WIDTH = 128
+
+class ColumnIndex():
+    """
+    Items with a rect, put into columns of column_width pixels so a collision lookup
+    only checks the items in the columns the given rect covers.
+
+    The rect of an item must not move horizontally after it is added, items which
+    can move horizontally must be added with moving=True and are checked one by one.
+    Each item has the order in which it was added, a lookup returns the colliding
+    item which was added first.
+
+    Attributes:
+        columns (dict): The items in each column, keyed by column index.
+        spans (dict): The (order, first column, last column) of each item.
+        moving (list): The items which are not put into columns.
+    """
+
+    def __init__(self, column_width=COLUMN_WIDTH):
+        self.column_width = column_width
+        self.columns = {}
+        self.spans = {}
+        self.moving = []
+        self.count = 0
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __contains__(self, item):
+        return item in self.spans
+
+    def add(self, item, moving=False):
+        self.count += 1
+        if moving:
+            self.spans[item] = (self.count, 0, -1)
+            self.moving.append(item)
+            return
+
+        rect = item.rect
+        first = rect.left // self.column_width
+        last = (rect.right - 1) // self.column_width
+        self.spans[item] = (self.count, first, last)
+        for column in range(first, last + 1):
+            self.columns.setdefault(column, []).append(item)
+
+    def remove(self, item):
+        _, first, last = self.spans.pop(item)
+        if first > last and item in self.moving:
+            self.moving.remove(item)
+        for column in range(first, last + 1):
+            self.columns[column].remove(item)
+
+    def collideany(self, rect):
+        '''return the first added item whose rect collides with the rect, or None'''
+        spans = self.spans
+        width = self.column_width
+        found = None
+        found_order = 0
+        for column in range(rect.left // width, (rect.right - 1) // width + 1):
+            for item in self.columns.get(column, ()):
+                if rect.colliderect(item.rect):
+                    order = spans[item][0]
+                    if found is None or order < found_order:
+                        found, found_order = item, order
+        for item in self.moving:
+            if rect.colliderect(item.rect):
+                order = spans[item][0]
+                if found is None or order < found_order:
+                    found, found_order = item, order
+        return found
+
+    def items_between(self, left, right):
+        '''return the items whose rect overlaps the x range from left to right, in the
+           order they were added'''
+        width = self.column_width
+        items = set()
+        for column in range(left // width, (right - 1) // width + 1):
+            for item in self.columns.get(column, ()):
+                if item.rect.right > left and item.rect.left < right:
+                    items.add(item)
+        for item in self.moving:
+            if item.rect.right > left and item.rect.left < right:
+                items.add(item)
+        spans = self.spans
+        return sorted(items, key=lambda item: spans[item][0])
+
+class IntervalIndex():
+    """
+    Items with a rect which never moves, sorted by the left of their rect, for few
+    narrow items spread along the level like the checkpoints. A lookup bisects to
+    the items which start left of the right of the given rect and checks them back
+    to the widest item width, which for narrow items is one or two. Like ColumnIndex,
+    a lookup returns the colliding item which was added first.
+
+    Attributes:
+        keys (list): The (left, order) of each item, sorted.
+        items (dict): The item of each key.
+        orders (dict): The key of each item.
+        max_width (int): The width of the widest item added.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.items = {}
+        self.orders = {}
+        self.max_width = 0
+        self.count = 0
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, item):
+        return item in self.orders
+
+    def add(self, item):
+        self.count += 1
+        rect = item.rect
+        key = (rect.left, self.count)
+        insort(self.keys, key)
+        self.items[key] = item
+        self.orders[item] = key
+        self.max_width = max(self.max_width, rect.width)
+
+    def remove(self, item):
+        key = self.orders.pop(item)
+        del self.items[key]
+        del self.keys[bisect_left(self.keys, key)]
+
+    def collideany(self, rect):
+        '''return the first added item whose rect collides with the rect, or None'''
+        keys = self.keys
+        left = rect.left - self.max_width
+        found = None
+        found_order = 0
+        # the items which start left of the right of the rect, back to the first
+        # one which cannot reach the rect
+        index = bisect_left(keys, (rect.right,))
+        while index > 0:
+            index -= 1
+            key = keys[index]
+            if key[0] <= left:
+                break
+            item = self.items[key]
+            if rect.colliderect(item.rect) and (found is None or key[1] < found_order):
+                found, found_order = item, key[1]
+        return found
@@ -1,16 +1,39 @@
 __author__ = 'marble_xu'
 
+import time
+from functools import partial
 import pygame as pg
-from . import setup, tools
+from . import setup, tools, replay
 from . import constants as c
 from .states import main_menu, load_screen, level
 
-def main():
-    game = tools.Control()
-    state_dict = {c.MAIN_MENU: main_menu.Menu(),
-                  c.LOAD_SCREEN: load_screen.LoadScreen(),
-                  c.LEVEL: level.Level(),
-                  c.GAME_OVER: load_screen.GameOver(),
-                  c.TIME_OUT: load_screen.TimeOut()}
-    game.setup_states(state_dict, c.MAIN_MENU)
-    game.main()
+def create_states(context=None):
+    '''return the states of the game, each one is created when it is first entered'''
+    return tools.StateRegistry({c.MAIN_MENU: partial(main_menu.Menu, context),
+                                c.LOAD_SCREEN: partial(load_screen.LoadScreen, context),
+                                c.LEVEL: partial(level.Level, context),
+                                c.GAME_OVER: partial(load_screen.GameOver, context),
+                                c.TIME_OUT: partial(load_screen.TimeOut, context)})
+
+def main(dirty_rect_mode=False, headless=False, max_frames=None,
+            fixed_step=False, speed=None, record_path=None, replay_path=None):
+    setup.init(headless)
+    input_recorder = replay.InputRecorder() if record_path else None
+    input_replay = replay.InputReplay.load(replay_path) if replay_path else None
+    # recorded input only gives the same game again with the fixed step clock
+    if fixed_step or input_recorder is not None or input_replay is not None:
+        game_clock = tools.FixedStepClock()
+    else:
+        game_clock = None
+    # the other states are created while the main menu waits for input
+    game = tools.Control(dirty_rect_mode, headless, game_clock, speed,
+                        input_recorder, input_replay, prewarm=not headless)
+    game.setup_states(create_states(), c.MAIN_MENU)
+    start = time.perf_counter()
+    game.main(max_frames)
+    if input_recorder is not None:
+        input_recorder.save(record_path)
+    if headless:
+        elapsed = time.perf_counter() - start
+        print('simulated %d frames in %.2f seconds, %.0f frames per second' %
+                (game.frames, elapsed, game.frames / elapsed))
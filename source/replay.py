@@ -0,0 +1,126 @@
+"""
+Recording and replaying of the player input.
+
+The key state passed to State.update in each frame is stored as one byte, a bitmask
+over the five actions of tools.keybinding and the keys used by the main menu.
+A replay feeds the recorded key states back in place of pg.key.get_pressed(), so
+with a FixedStepClock the game runs exactly as it did when it was recorded.
+"""
+
+import array
+import pygame as pg
+from . import tools
+
+MAGIC = b'SMBR'
+VERSION = 1
+
+# the bit of each input in the bitmask, the last three are the keys of the main menu
+INPUT_LIST = ['action', 'jump', 'left', 'right', 'down', 'menu up', 'menu down', 'menu enter']
+MENU_KEYS = {'menu up': pg.K_UP, 'menu down': pg.K_DOWN, 'menu enter': pg.K_RETURN}
+
+def get_key_codes(keybinding=None):
+    '''return the key code of each input bit, with tools.keybinding by default'''
+    if keybinding is None:
+        keybinding = tools.keybinding
+    return [keybinding[name] if name in keybinding else MENU_KEYS[name]
+            for name in INPUT_LIST]
+
+def make_mask(*names):
+    '''return the bitmask with the bits of the named inputs set'''
+    mask = 0
+    for name in names:
+        mask |= 1 << INPUT_LIST.index(name)
+    return mask
+
+def encode_keys(keys, key_codes=None):
+    '''return the bitmask of the pressed inputs in keys'''
+    if key_codes is None:
+        key_codes = get_key_codes()
+    mask = 0
+    for i, code in enumerate(key_codes):
+        if keys[code]:
+            mask |= 1 << i
+    return mask
+
+class ReplayKeys():
+    """
+    A key state built from a bitmask, which can be indexed by key code like the
+    result of pg.key.get_pressed().
+    """
+
+    def __init__(self, mask, key_codes):
+        self.mask = mask
+        self.pressed = {code for i, code in enumerate(key_codes) if mask & (1 << i)}
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class KeyDecoder():
+    """
+    Turns bitmasks into key states, there is only one key state for each bitmask.
+    """
+
+    def __init__(self, keybinding=None):
+        self.key_codes = get_key_codes(keybinding)
+        self.keys_cache = {}
+
+    def get_keys(self, mask):
+        keys = self.keys_cache.get(mask)
+        if keys is None:
+            keys = ReplayKeys(mask, self.key_codes)
+            self.keys_cache[mask] = keys
+        return keys
+
+class InputRecorder():
+    """
+    Records the key state of each frame.
+
+    Attributes:
+        masks (array): The bitmask of each recorded frame.
+    """
+
+    def __init__(self):
+        self.key_codes = get_key_codes()
+        self.masks = array.array('B')
+
+    def record(self, keys):
+        self.masks.append(encode_keys(keys, self.key_codes))
+
+    def save(self, file_path):
+        with open(file_path, 'wb') as f:
+            f.write(MAGIC + bytes([VERSION]))
+            f.write(self.masks.tobytes())
+
+class InputReplay():
+    """
+    Gives back the recorded key state of each frame.
+
+    Attributes:
+        masks (array): The bitmask of each recorded frame.
+        index (int): The frame whose keys are returned next.
+    """
+
+    def __init__(self, masks):
+        self.masks = array.array('B', masks)
+        self.index = 0
+        self.decoder = KeyDecoder()
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if (len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC or
+                data[len(MAGIC)] != VERSION):
+            raise ValueError('%s is not a replay file' % file_path)
+        return cls(data[len(MAGIC) + 1:])
+
+    def __len__(self):
+        return len(self.masks)
+
+    def next_keys(self):
+        '''return the key state of the next frame, or None when the replay is finished'''
+        if self.index >= len(self.masks):
+            return None
+        mask = self.masks[self.index]
+        self.index += 1
+        return self.decoder.get_keys(mask)
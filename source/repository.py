@@ -0,0 +1,116 @@
+"""
+The level maps and player data of source/data, parsed once per process.
+
+A file is parsed the first time it is loaded and the parsed data is returned again
+as long as the file does not change. The data is frozen: dicts become read only
+mappings and lists become tuples, so all the levels can share it. The parsed form
+of each file is also stored next to it in a .cache file (with marshal), which is
+used instead of parsing the json while the size and modification time of the file
+match the ones stored in the cache.
+"""
+
+import os
+import json
+import marshal
+from types import MappingProxyType
+from . import constants as c
+
+MAP_DIRECTORY = os.path.join('source', 'data', 'maps')
+PLAYER_DIRECTORY = os.path.join('source', 'data', 'player')
+CACHE_VERSION = 1
+
+# the map entries the level reads without checking that they are there
+MAP_REQUIRED = (c.MAP_IMAGE, c.MAP_ENEMY, c.MAP_CHECKPOINT)
+PLAYER_REQUIRED = (c.PLAYER_SPEED, c.PLAYER_FRAMES)
+
+def freeze(data):
+    '''return the parsed json data with its dicts made read only and its lists tuples'''
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(value) for value in data)
+    return data
+
+def validate_map(data, file_path):
+    for key in MAP_REQUIRED:
+        if key not in data:
+            raise ValueError('%s: the map has no %s' % (file_path, key))
+    for key, items in data.items():
+        if key == c.MAP_ENEMY or not isinstance(items, list):
+            continue
+        for item in items:
+            if key != c.MAP_MAPS and ('x' not in item or 'y' not in item):
+                raise ValueError('%s: an item of %s has no position' % (file_path, key))
+
+def validate_player(data, file_path):
+    for key in PLAYER_REQUIRED:
+        if key not in data:
+            raise ValueError('%s: the player data has no %s' % (file_path, key))
+
+class DataRepository():
+    """
+    Attributes:
+        entries (dict): The (stamp, data) of each loaded file, keyed by file path.
+        use_cache_files (bool): Read and write the .cache files next to the files.
+        parses (int): The number of files parsed from json.
+    """
+
+    def __init__(self, use_cache_files=True):
+        self.entries = {}
+        self.use_cache_files = use_cache_files
+        self.parses = 0
+
+    def load(self, file_path, validate=None):
+        '''return the frozen data of the json file, validate is called when it is parsed'''
+        stat = os.stat(file_path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        entry = self.entries.get(file_path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        data = self.read_cache_file(file_path, stamp)
+        if data is None:
+            with open(file_path) as f:
+                data = json.load(f)
+            self.parses += 1
+            if validate is not None:
+                validate(data, file_path)
+            self.write_cache_file(file_path, stamp, data)
+        data = freeze(data)
+        self.entries[file_path] = (stamp, data)
+        return data
+
+    def read_cache_file(self, file_path, stamp):
+        if not self.use_cache_files:
+            return None
+        try:
+            with open(file_path + '.cache', 'rb') as f:
+                version, size, mtime, data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != CACHE_VERSION or (size, mtime) != stamp:
+            return None
+        return data
+
+    def write_cache_file(self, file_path, stamp, data):
+        if not self.use_cache_files:
+            return
+        try:
+            with open(file_path + '.cache', 'wb') as f:
+                marshal.dump((CACHE_VERSION,) + stamp + (data,), f)
+        except OSError:
+            # a read only data directory, the json is parsed again next time
+            pass
+
+    def clear(self):
+        self.entries = {}
+
+repository = DataRepository()
+
+def load_map(level_num):
+    file_path = os.path.join(MAP_DIRECTORY, 'level_' + str(level_num) + '.json')
+    return repository.load(file_path, validate_map)
+
+def load_player(player_name):
+    file_path = os.path.join(PLAYER_DIRECTORY, str(player_name) + '.json')
+    return repository.load(file_path, validate_player)
@@ -0,0 +1,144 @@
+"""
+Save states of a running level, see Level.snapshot and Level.restore.
+
+A save state keeps a copy of the attributes of the level, its info and every sprite
+which can change, and the sprites of every group. Surfaces and other attributes
+which are never changed in place are shared with the level, not copied. Rects are
+copied. Restoring puts the attributes back and only refills the groups whose
+sprites have changed, so sprites created after the snapshot are dropped and sprites
+killed after the snapshot come back.
+
+The player blinks by changing the alpha of its frames in place, so the alpha of
+each of its frames is saved too.
+
+A save state can be restored any number of times, but only into the level it was
+taken from.
+"""
+
+import pygame as pg
+
+class ObjectState():
+    """
+    The attributes of an object. The lists, dicts, sets and rects among them are
+    copied and restored in place, because other objects hold references to them
+    (the level game_info, moving_score_list and the info labels).
+    """
+
+    def __init__(self, obj, exclude=()):
+        self.obj = obj
+        self.attrs = {key: value for key, value in obj.__dict__.items()
+                        if key not in exclude}
+        self.contents = []
+        for value in self.attrs.values():
+            if isinstance(value, (list, dict, set)):
+                self.contents.append((value, value.copy()))
+            elif isinstance(value, pg.Rect):
+                self.contents.append((value, value.copy()))
+
+    def restore(self):
+        self.obj.__dict__.update(self.attrs)
+        for live, saved in self.contents:
+            if isinstance(live, list):
+                live[:] = saved
+            elif isinstance(live, pg.Rect):
+                live.update(saved)
+            else:
+                live.clear()
+                live.update(saved)
+
+class SpriteState():
+    """
+    The attributes of a sprite. Only the rects are copied, the lists of a sprite
+    (its frames) are never changed in place. The groups of the sprite are restored
+    by the groups.
+    """
+    __slots__ = ['sprite', 'attrs', 'rect_keys']
+
+    def __init__(self, sprite):
+        self.sprite = sprite
+        self.attrs = attrs = sprite.__dict__.copy()
+        del attrs['_Sprite__g']
+        self.rect_keys = [key for key, value in attrs.items() if type(value) is pg.Rect]
+        for key in self.rect_keys:
+            attrs[key] = attrs[key].copy()
+
+    def restore(self):
+        attrs = self.sprite.__dict__
+        groups = attrs['_Sprite__g']
+        attrs.clear()
+        attrs.update(self.attrs)
+        attrs['_Sprite__g'] = groups
+        for key in self.rect_keys:
+            attrs[key] = attrs[key].copy()
+
+class LevelState():
+    """
+    A save state of a level.
+
+    The attributes named in keep are not saved, restoring leaves them and the sprites
+    they refer to as they are. The level templates are never saved.
+
+    Attributes:
+        level_state (ObjectState): The attributes of the level.
+        info_state (ObjectState): The attributes of the overhead info, None if kept.
+        sprite_states (list): The SpriteState of each sprite which can change.
+        group_sprites (list): The (group, sprites) of each group.
+        score_rects (list): The (digit, rect) of each digit of the moving scores.
+        player_alphas (list): The (image, alpha) of each frame of the player, empty
+            if the player is kept.
+    """
+    # the sprites of these groups never change, only the groups are saved
+    STATIC_GROUPS = ('ground_group', 'step_group', 'pipe_group', 'checkpoint_group',
+                     'ground_step_pipe_group')
+
+    def __init__(self, level, keep=()):
+        groups = [value for value in level.__dict__.values()
+                    if isinstance(value, pg.sprite.AbstractGroup)]
+        # the enemy groups which are not built yet are built again after a restore
+        groups += [group for group in level.enemy_group_list if group is not None]
+        self.group_sprites = [(group, group.sprites()) for group in groups]
+
+        static_groups = {id(getattr(level, name)) for name in self.STATIC_GROUPS}
+        sprites = {}
+        for group in groups:
+            if id(group) not in static_groups:
+                sprites.update(dict.fromkeys(group.sprites()))
+        if 'overhead_info' in keep:
+            self.info_state = None
+        else:
+            sprites[level.overhead_info.flashing_coin] = None
+            self.info_state = ObjectState(level.overhead_info)
+        for name in keep:
+            value = getattr(level, name)
+            if isinstance(value, pg.sprite.Sprite):
+                sprites.pop(value, None)
+        self.sprite_states = [SpriteState(sprite) for sprite in sprites]
+
+        self.level_state = ObjectState(level, exclude=('last_blits', 'last_viewport',
+                                                       'templates') + tuple(keep))
+        self.score_rects = [(digit, digit.rect.copy()) for score in level.moving_score_list
+                                for digit in score.digit_list]
+        if 'player' in keep:
+            self.player_alphas = []
+        else:
+            self.player_alphas = [(image, image.get_alpha())
+                    for frames in level.player.all_images for image in frames]
+
+    def restore(self, level):
+        self.level_state.restore()
+        if self.info_state is not None:
+            self.info_state.restore()
+        for sprite_state in self.sprite_states:
+            sprite_state.restore()
+        for digit, rect in self.score_rects:
+            digit.rect = rect.copy()
+        for image, alpha in self.player_alphas:
+            if image.get_alpha() != alpha:
+                image.set_alpha(alpha)
+        for group, sprites in self.group_sprites:
+            if group.sprites() != sprites:
+                group.empty()
+                group.add(*sprites)
+        # the screen no longer shows the last drawn frame of the level
+        level.last_viewport = None
+        level.last_blits = set()
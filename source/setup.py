@@ -1,14 +1,52 @@
 __author__ = 'marble_xu'
 
+"""
+Initializes pygame, opens the window and loads the graphics. Importing this module
+does neither, call init first, or access SCREEN, SCREEN_RECT, GFX or BUNDLE, which
+calls it. The init functions can be called any number of times, only the first
+call does anything.
+"""
+
 import os
 import pygame as pg
 from . import constants as c
-from . import tools
+from . import tools, bundle
+
+def init_display(headless=False):
+    '''initialize pygame and open the window, or the dummy display if headless'''
+    global SCREEN, SCREEN_RECT
+    if 'SCREEN' not in globals():
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        pg.init()
+        pg.event.set_allowed([pg.KEYDOWN, pg.KEYUP, pg.QUIT])
+        pg.display.set_caption(c.ORIGINAL_CAPTION)
+        SCREEN = pg.display.set_mode(c.SCREEN_SIZE)
+        SCREEN_RECT = SCREEN.get_rect()
+    return SCREEN
+
+def is_background(name):
+    return name.startswith('level_')
+
+def load_graphics():
+    '''list the graphics and load the bundle, the display must be open to convert them'''
+    global GFX, BUNDLE
+    if 'GFX' not in globals():
+        # the images are loaded on first use, only the background of the level being
+        # played is kept loaded
+        GFX = tools.load_all_gfx(os.path.join("resources","graphics"), evictable=is_background)
+        # the pre-cut frames and prescaled backgrounds of python -m source.bundle, if built
+        BUNDLE = bundle.load_bundle(GFX)
+    return GFX
 
-pg.init()
-pg.event.set_allowed([pg.KEYDOWN, pg.KEYUP, pg.QUIT])
-pg.display.set_caption(c.ORIGINAL_CAPTION)
-SCREEN = pg.display.set_mode(c.SCREEN_SIZE)
-SCREEN_RECT = SCREEN.get_rect()
+def init(headless=False):
+    '''open the display and load the graphics, return the screen'''
+    init_display(headless)
+    load_graphics()
+    return SCREEN
 
-GFX = tools.load_all_gfx(os.path.join("resources","graphics"))
\ No newline at end of file
+def __getattr__(name):
+    if name in ('SCREEN', 'SCREEN_RECT', 'GFX', 'BUNDLE'):
+        init()
+        return globals()[name]
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
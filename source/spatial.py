@@ -0,0 +1,96 @@
+import pygame as pg
+from . import geometry
+
+class ColumnGroup(pg.sprite.Group):
+    """
+    A sprite group which also keeps its sprites in a geometry.ColumnIndex, so a
+    collision query only checks the sprites in the columns the given sprite covers
+    instead of every sprite of the group.
+
+    The sprites must not move horizontally after they are added (ground, step, pipe,
+    brick and box only move up and down). Sprites which can move horizontally, like the
+    sliders, must be added with add_moving and are checked one by one.
+
+    Attributes:
+        index (ColumnIndex): The sprites of the group by column.
+        moving_set (set): The sprites added with add_moving, they stay moving when
+            they are removed and added again.
+    """
+
+    def __init__(self, *sprites):
+        self.index = geometry.ColumnIndex()
+        self.moving_set = set()
+        pg.sprite.Group.__init__(self, *sprites)
+
+    def add_moving(self, *sprites):
+        '''add sprites or groups of sprites which can move horizontally'''
+        for item in sprites:
+            if isinstance(item, pg.sprite.Sprite):
+                item = [item]
+            for sprite in item:
+                self.moving_set.add(sprite)
+                self.add(sprite)
+
+    def add_internal(self, sprite, layer=None):
+        pg.sprite.Group.add_internal(self, sprite, layer)
+        self.index.add(sprite, sprite in self.moving_set)
+
+    def remove_internal(self, sprite):
+        pg.sprite.Group.remove_internal(self, sprite)
+        self.index.remove(sprite)
+
+    def collideany(self, sprite):
+        '''return the first sprite of this group which collides with the sprite, or None'''
+        return self.index.collideany(sprite.rect)
+
+    def sprites_between(self, left, right):
+        '''return the sprites of this group which overlap the x range from left to right,
+           in group order'''
+        return self.index.items_between(left, right)
+
+class IntervalGroup(pg.sprite.Group):
+    """
+    A sprite group of sprites which never move, which also keeps them in a
+    geometry.IntervalIndex sorted by x. For the checkpoints: a collision query
+    only checks the one or two checkpoints around the given sprite.
+
+    Attributes:
+        index (IntervalIndex): The sprites of the group sorted by x.
+    """
+
+    def __init__(self, *sprites):
+        self.index = geometry.IntervalIndex()
+        pg.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pg.sprite.Group.add_internal(self, sprite, layer)
+        self.index.add(sprite)
+
+    def remove_internal(self, sprite):
+        pg.sprite.Group.remove_internal(self, sprite)
+        self.index.remove(sprite)
+
+    def collideany(self, sprite):
+        '''return the first sprite of this group which collides with the sprite, or None'''
+        return self.index.collideany(sprite.rect)
+
+class SolidWorld():
+    """
+    The solid parts of a level: ground, step, pipe, slider, brick and box.
+
+    One SolidWorld is created by the level and shared by everything which checks
+    for collisions with the level. The groups are column groups, so a brick which
+    breaks or a box which is added is kept current by the groups themselves.
+    """
+
+    def __init__(self, ground_step_pipe_group, brick_group, box_group):
+        self.groups = (ground_step_pipe_group, brick_group, box_group)
+
+    def collideany(self, sprite):
+        '''return the first solid sprite which collides with the sprite, or None.
+           the groups are checked in order, like pg.sprite.spritecollideany on their union'''
+        for group in self.groups:
+            found = group.collideany(sprite)
+            if found is not None:
+                return found
+        return None
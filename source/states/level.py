@@ -1,27 +1,59 @@
 __author__ = 'marble_xu'
 
-import os
-import json
 import pygame as pg
-from .. import setup, tools
+from .. import tools, spatial, savestate, repository
 from .. import constants as c
+from ..context import get_default_context
 from ..components import info, stuff, player, brick, box, enemy, powerup, coin
 
 
 class Level(tools.State):
-    def __init__(self):
+    # the attributes which a level template does not reset
+    TEMPLATE_KEEP = ('game_info', 'persist', 'overhead_info', 'player')
+    # the enemy groups whose checkpoint is this far right of the viewport are built
+    ENEMY_PREWARM_DISTANCE = c.SCREEN_WIDTH * 2
+    # the bricks and enemies sleep while they are more than ACTIVITY_MARGIN left or right
+    # of the viewport: they are not updated until they are back in that range, see
+    # update_awake. shells, powerups and fireballs, coins and pieces are always updated
+    ACTIVITY_MARGIN = c.SCREEN_WIDTH
+    # the enemies which never sleep: the boss of level 4 is added by a checkpoint far
+    # from the viewport and shoots fireballs across the screen from there
+    ALWAYS_AWAKE = (c.FIRE, c.FIRE_KOOPA)
+    # the sprite sheets loaded by prewarm, one each call
+    PREWARM_SHEETS = ('tile_set', 'mario_bros', c.ITEM_SHEET, c.ENEMY_SHEET)
+
+    def __init__(self, context=None):
         tools.State.__init__(self)
+        self.context = context or get_default_context()
         self.player = None
+        # the state of the level number being played right after its setup, see reset.
+        # only one is kept, a template keeps the scaled background of its level alive
+        self.templates = {}
+        self.prewarm_index = 0
+
+    def prewarm(self):
+        '''load the next sprite sheet, they are loaded on first use, return True while
+           there are sheets left'''
+        if self.prewarm_index < len(self.PREWARM_SHEETS):
+            self.context.gfx[self.PREWARM_SHEETS[self.prewarm_index]]
+            self.prewarm_index += 1
+        return self.prewarm_index < len(self.PREWARM_SHEETS)
 
     def startup(self, current_time, persist):
         self.game_info = persist
         self.persist = self.game_info
         self.game_info[c.CURRENT_TIME] = current_time
+        template = self.templates.get(self.game_info[c.LEVEL_NUM])
+        if template is not None:
+            self.reset(template)
+            return
         self.death_timer = 0
         self.castle_timer = 0
         
         self.moving_score_list = []
-        self.overhead_info = info.Info(self.game_info, c.LEVEL)
+        self.last_viewport = None
+        self.last_blits = set()
+        self.overhead_info = info.Info(self.context, self.game_info, c.LEVEL)
         self.load_map()
         self.setup_background()
         self.setup_maps()
@@ -36,25 +68,42 @@ class Level(tools.State):
         self.setup_checkpoints()
         self.setup_flagpole()
         self.setup_sprite_groups()
+        self.templates = {self.game_info[c.LEVEL_NUM]: savestate.LevelState(self,
+                                                        keep=self.TEMPLATE_KEEP)}
+
+    def reset(self, template):
+        '''restore the level to its template instead of creating all its sprites again'''
+        template.restore(self)
+        self.overhead_info = info.Info(self.context, self.game_info, c.LEVEL)
+        # as in startup, the player is placed before the viewport follows it
+        self.viewport.x = 0
+        self.setup_player()
+        if self.player not in self.player_group:
+            self.player_group.empty()
+            self.player_group.add(self.player)
+
+    def snapshot(self):
+        '''return a save state of the running level, see savestate.LevelState'''
+        return savestate.LevelState(self)
+
+    def restore(self, state):
+        '''go back to the save state, which must have been taken from this level'''
+        state.restore(self)
 
     def load_map(self):
-        map_file = 'level_' + str(self.game_info[c.LEVEL_NUM]) + '.json'
-        file_path = os.path.join('source', 'data', 'maps', map_file)
-        f = open(file_path)
-        self.map_data = json.load(f)
-        f.close()
+        # parsed once, the map data is read only and shared by all the levels
+        self.map_data = repository.load_map(self.game_info[c.LEVEL_NUM])
         
     def setup_background(self):
         img_name = self.map_data[c.MAP_IMAGE]
-        self.background = setup.GFX[img_name]
-        self.bg_rect = self.background.get_rect()
-        self.background = pg.transform.scale(self.background, 
-                                    (int(self.bg_rect.width*c.BACKGROUND_MULTIPLER),
-                                    int(self.bg_rect.height*c.BACKGROUND_MULTIPLER)))
+        self.background = self.context.gfx.get_scaled(img_name, c.BACKGROUND_MULTIPLER)
         self.bg_rect = self.background.get_rect()
 
-        self.level = pg.Surface((self.bg_rect.w, self.bg_rect.h)).convert()
-        self.viewport = setup.SCREEN.get_rect(bottom=self.bg_rect.bottom)
+        self.viewport = self.context.screen_rect.copy()
+        self.viewport.bottom = self.bg_rect.bottom
+        # back buffer is only as large as the viewport, sprites are drawn
+        # into it shifted by the viewport position
+        self.level = pg.Surface((self.viewport.w, self.viewport.h)).convert()
 
     def setup_maps(self):
         self.map_list = []
@@ -90,10 +139,10 @@ class Level(tools.State):
         return group
 
     def setup_pipe(self):
-        self.pipe_group = pg.sprite.Group()
+        self.pipe_group = spatial.ColumnGroup()
         if c.MAP_PIPE in self.map_data:
             for data in self.map_data[c.MAP_PIPE]:
-                self.pipe_group.add(stuff.Pipe(data['x'], data['y'],
+                self.pipe_group.add(stuff.Pipe(self.context, data['x'], data['y'],
                     data['width'], data['height'], data['type']))
 
     def setup_slider(self):
@@ -104,36 +153,36 @@ class Level(tools.State):
                     vel = data[c.VELOCITY]
                 else:
                     vel = 1
-                self.slider_group.add(stuff.Slider(data['x'], data['y'], data['num'],
+                self.slider_group.add(stuff.Slider(self.context, data['x'], data['y'], data['num'],
                     data['direction'], data['range_start'], data['range_end'], vel))
 
     def setup_static_coin(self):
         self.static_coin_group = pg.sprite.Group()
         if c.MAP_COIN in self.map_data:
             for data in self.map_data[c.MAP_COIN]:
-                self.static_coin_group.add(coin.StaticCoin(data['x'], data['y']))
+                self.static_coin_group.add(coin.StaticCoin(self.context, data['x'], data['y']))
 
     def setup_brick_and_box(self):
         self.coin_group = pg.sprite.Group()
         self.powerup_group = pg.sprite.Group()
-        self.brick_group = pg.sprite.Group()
+        self.brick_group = spatial.ColumnGroup()
         self.brickpiece_group = pg.sprite.Group()
 
         if c.MAP_BRICK in self.map_data:
             for data in self.map_data[c.MAP_BRICK]:
                 brick.create_brick(self.brick_group, data, self)
         
-        self.box_group = pg.sprite.Group()
+        self.box_group = spatial.ColumnGroup()
         if c.MAP_BOX in self.map_data:
             for data in self.map_data[c.MAP_BOX]:
                 if data['type'] == c.TYPE_COIN:
-                    self.box_group.add(box.Box(data['x'], data['y'], data['type'], self.coin_group))
+                    self.box_group.add(box.Box(self.context, data['x'], data['y'], data['type'], self.coin_group))
                 else:
-                    self.box_group.add(box.Box(data['x'], data['y'], data['type'], self.powerup_group))
+                    self.box_group.add(box.Box(self.context, data['x'], data['y'], data['type'], self.powerup_group))
             
     def setup_player(self):
         if self.player is None:
-            self.player = player.Player(self.game_info[c.PLAYER_NAME])
+            self.player = player.Player(self.context, self.game_info[c.PLAYER_NAME])
         else:
             self.player.restart()
         self.player.rect.x = self.viewport.x + self.player_x
@@ -144,17 +193,48 @@ class Level(tools.State):
         self.viewport.x = self.player.rect.x - 110
 
     def setup_enemies(self):
-        self.enemy_group_list = []
+        '''
+        keep the map data of each enemy group, a group is built when its checkpoint
+        is reached (see get_enemy_group) or comes near the viewport (see prewarm_enemies)
+        '''
+        self.enemy_spawn_list = []
         index = 0
         for data in self.map_data[c.MAP_ENEMY]:
+            self.enemy_spawn_list.append(data[str(index)])
+            index += 1
+        self.enemy_group_list = [None] * len(self.enemy_spawn_list)
+        # the (x, enemy group id) of the enemy checkpoints, sorted by x
+        self.enemy_checkpoint_list = sorted((data['x'], data.get(c.ENEMY_GROUPID, 0))
+                for data in self.map_data[c.MAP_CHECKPOINT]
+                if data['type'] == c.CHECKPOINT_TYPE_ENEMY)
+        self.enemy_prewarm_index = 0
+
+    def get_enemy_group(self, index):
+        '''return the enemy group of the index, build its enemies if it is not built yet'''
+        group = self.enemy_group_list[index]
+        if group is None:
             group = pg.sprite.Group()
-            for item in data[str(index)]:
+            for item in self.enemy_spawn_list[index]:
                 group.add(enemy.create_enemy(item, self))
-            self.enemy_group_list.append(group)
-            index += 1
-            
+            self.enemy_group_list[index] = group
+        return group
+
+    def prewarm_enemies(self):
+        '''build the next enemy group whose checkpoint comes near the viewport, at most
+           one a frame, so that reaching the checkpoint does not build it'''
+        right = self.viewport.right + self.ENEMY_PREWARM_DISTANCE
+        while self.enemy_prewarm_index < len(self.enemy_checkpoint_list):
+            x, index = self.enemy_checkpoint_list[self.enemy_prewarm_index]
+            if x >= right:
+                return
+            self.enemy_prewarm_index += 1
+            if self.enemy_group_list[index] is None:
+                self.get_enemy_group(index)
+                return
+
     def setup_checkpoints(self):
-        self.checkpoint_group = pg.sprite.Group()
+        # checked every frame, the checkpoints around the player are found by x
+        self.checkpoint_group = spatial.IntervalGroup()
         for data in self.map_data[c.MAP_CHECKPOINT]:
             if c.ENEMY_GROUPID in data:
                 enemy_groupid = data[c.ENEMY_GROUPID]
@@ -172,12 +252,12 @@ class Level(tools.State):
         if c.MAP_FLAGPOLE in self.map_data:
             for data in self.map_data[c.MAP_FLAGPOLE]:
                 if data['type'] == c.FLAGPOLE_TYPE_FLAG:
-                    sprite = stuff.Flag(data['x'], data['y'])
+                    sprite = stuff.Flag(self.context, data['x'], data['y'])
                     self.flag = sprite
                 elif data['type'] == c.FLAGPOLE_TYPE_POLE:
-                    sprite = stuff.Pole(data['x'], data['y'])
+                    sprite = stuff.Pole(self.context, data['x'], data['y'])
                 else:
-                    sprite = stuff.PoleTop(data['x'], data['y'])
+                    sprite = stuff.PoleTop(self.context, data['x'], data['y'])
                 self.flagpole_group.add(sprite)
         
         
@@ -186,14 +266,18 @@ class Level(tools.State):
         self.enemy_group = pg.sprite.Group()
         self.shell_group = pg.sprite.Group()
         
-        self.ground_step_pipe_group = pg.sprite.Group(self.ground_group,
-                        self.pipe_group, self.step_group, self.slider_group)
+        self.ground_step_pipe_group = spatial.ColumnGroup(self.ground_group,
+                        self.pipe_group, self.step_group)
+        self.ground_step_pipe_group.add_moving(self.slider_group)
+        self.solid_world = spatial.SolidWorld(self.ground_step_pipe_group,
+                        self.brick_group, self.box_group)
         self.player_group = pg.sprite.Group(self.player)
         
     def update(self, surface, keys, current_time):
         self.game_info[c.CURRENT_TIME] = self.current_time = current_time
         self.handle_states(keys)
-        self.draw(surface)
+        if surface is not None:
+            self.draw(surface)
     
     def handle_states(self, keys):
         self.update_all_sprites(keys)
@@ -223,9 +307,9 @@ class Level(tools.State):
             self.check_checkpoints()
             self.slider_group.update()
             self.static_coin_group.update(self.game_info)
-            self.enemy_group.update(self.game_info, self)
+            self.update_awake(self.enemy_group, self.game_info, self)
             self.shell_group.update(self.game_info, self)
-            self.brick_group.update()
+            self.update_awake(self.brick_group)
             self.box_group.update(self.game_info)
             self.powerup_group.update(self.game_info, self)
             self.coin_group.update(self.game_info)
@@ -234,16 +318,31 @@ class Level(tools.State):
             self.update_player_position()
             self.check_for_player_death()
             self.update_viewport()
+            self.prewarm_enemies()
             self.overhead_info.update(self.game_info, self.player)
             for score in self.moving_score_list:
                 score.update(self.moving_score_list)
     
+    def update_awake(self, group, *args):
+        '''update the sprites of the group which are awake, in group order'''
+        left = self.viewport.x - self.ACTIVITY_MARGIN
+        right = self.viewport.right + self.ACTIVITY_MARGIN
+        if isinstance(group, spatial.ColumnGroup):
+            # only the sprites around the viewport, not every sprite of the level
+            sprites = group.sprites_between(left, right)
+        else:
+            sprites = group.sprites()
+        for sprite in sprites:
+            if ((sprite.rect.right > left and sprite.rect.x < right) or
+                    sprite.name in self.ALWAYS_AWAKE):
+                sprite.update(*args)
+
     def check_checkpoints(self):
-        checkpoint = pg.sprite.spritecollideany(self.player, self.checkpoint_group)
+        checkpoint = self.checkpoint_group.collideany(self.player)
         
         if checkpoint:
             if checkpoint.type == c.CHECKPOINT_TYPE_ENEMY:
-                group = self.enemy_group_list[checkpoint.enemy_groupid]
+                group = self.get_enemy_group(checkpoint.enemy_groupid)
                 self.enemy_group.add(group)
             elif checkpoint.type == c.CHECKPOINT_TYPE_FLAG:
                 self.player.state = c.FLAGPOLE
@@ -255,10 +354,10 @@ class Level(tools.State):
                 self.player.state = c.IN_CASTLE
                 self.player.x_vel = 0
                 self.castle_timer = self.current_time
-                self.flagpole_group.add(stuff.CastleFlag(8745, 322))
+                self.flagpole_group.add(stuff.CastleFlag(self.context, 8745, 322))
             elif (checkpoint.type == c.CHECKPOINT_TYPE_MUSHROOM and
                     self.player.y_vel < 0):
-                mushroom_box = box.Box(checkpoint.rect.x, checkpoint.rect.bottom - 40,
+                mushroom_box = box.Box(self.context, checkpoint.rect.x, checkpoint.rect.bottom - 40,
                                 c.TYPE_LIFEMUSHROOM, self.powerup_group)
                 mushroom_box.start_bump(self.moving_score_list)
                 self.box_group.add(mushroom_box)
@@ -302,9 +401,9 @@ class Level(tools.State):
             self.check_player_y_collisions()
     
     def check_player_x_collisions(self):
-        ground_step_pipe = pg.sprite.spritecollideany(self.player, self.ground_step_pipe_group)
-        brick = pg.sprite.spritecollideany(self.player, self.brick_group)
-        box = pg.sprite.spritecollideany(self.player, self.box_group)
+        ground_step_pipe = self.ground_step_pipe_group.collideany(self.player)
+        brick = self.brick_group.collideany(self.player)
+        box = self.box_group.collideany(self.player)
         enemy = pg.sprite.spritecollideany(self.player, self.enemy_group)
         shell = pg.sprite.spritecollideany(self.player, self.shell_group)
         powerup = pg.sprite.spritecollideany(self.player, self.powerup_group)
@@ -395,14 +494,14 @@ class Level(tools.State):
         self.player.x_vel = 0
 
     def check_player_y_collisions(self):
-        ground_step_pipe = pg.sprite.spritecollideany(self.player, self.ground_step_pipe_group)
+        ground_step_pipe = self.ground_step_pipe_group.collideany(self.player)
         enemy = pg.sprite.spritecollideany(self.player, self.enemy_group)
         shell = pg.sprite.spritecollideany(self.player, self.shell_group)
 
         # decrease runtime delay: when player is on the ground, don't check brick and box
         if self.player.rect.bottom < c.GROUND_HEIGHT:
-            brick = pg.sprite.spritecollideany(self.player, self.brick_group)
-            box = pg.sprite.spritecollideany(self.player, self.box_group)
+            brick = self.brick_group.collideany(self.player)
+            box = self.box_group.collideany(self.player)
             brick, box = self.prevent_collision_conflict(brick, box)
         else:
             brick, box = False, False
@@ -519,10 +618,9 @@ class Level(tools.State):
 
     def check_is_falling(self, sprite):
         sprite.rect.y += 1
-        check_group = pg.sprite.Group(self.ground_step_pipe_group,
-                            self.brick_group, self.box_group)
-        
-        if pg.sprite.spritecollideany(sprite, check_group) is None:
+        collider = self.solid_world.collideany(sprite)
+
+        if collider is None:
             if (sprite.state == c.WALK_AUTO or
                 sprite.state == c.END_OF_LEVEL_FALL):
                 sprite.state = c.END_OF_LEVEL_FALL
@@ -541,7 +639,7 @@ class Level(tools.State):
     def check_if_player_on_IN_pipe(self):
         '''check if player is on the pipe which can go down in to it '''
         self.player.rect.y += 1
-        pipe = pg.sprite.spritecollideany(self.player, self.pipe_group)
+        pipe = self.pipe_group.collideany(self.player)
         if pipe and pipe.type == c.PIPE_TYPE_IN:
             if (self.player.crouching and
                 self.player.rect.x < pipe.rect.centerx and
@@ -583,28 +681,80 @@ class Level(tools.State):
         self.game_info[c.COIN_TOTAL] += coin_num
         x = sprite.rect.x
         y = sprite.rect.y - 10
-        self.moving_score_list.append(stuff.Score(x, y, score))
+        self.moving_score_list.append(stuff.Score(self.context, x, y, score))
 
     def draw(self, surface):
-        self.level.blit(self.background, self.viewport, self.viewport)
-        self.powerup_group.draw(self.level)
-        self.brick_group.draw(self.level)
-        self.box_group.draw(self.level)
-        self.coin_group.draw(self.level)
-        self.dying_group.draw(self.level)
-        self.brickpiece_group.draw(self.level)
-        self.flagpole_group.draw(self.level)
-        self.shell_group.draw(self.level)
-        self.enemy_group.draw(self.level)
-        self.player_group.draw(self.level)
-        self.static_coin_group.draw(self.level)
-        self.slider_group.draw(self.level)
-        self.pipe_group.draw(self.level)
-        for score in self.moving_score_list:
-            score.draw(self.level)
+        blit_list = self.get_blit_list()
+        info_list = self.overhead_info.get_blit_list()
+        if self.dirty_rect_mode and self.last_viewport == self.viewport.topleft:
+            self.draw_dirty_areas(surface, blit_list, info_list)
+        else:
+            self.draw_level(self.level, blit_list)
+            surface.blit(self.level, (0,0))
+            surface.blits(info_list, False)
+            self.dirty_rects = None
+
+        if self.dirty_rect_mode:
+            self.last_viewport = self.viewport.topleft
+            self.last_blits = self.get_blit_keys(blit_list, info_list)
+
+    def draw_level(self, surface, blit_list):
+        '''draw the background and the sprites of the viewport, without the info'''
+        surface.blit(self.background, (0,0), self.viewport)
+        surface.blits(blit_list, False)
         if c.DEBUG:
-            self.ground_step_pipe_group.draw(self.level)
-            self.checkpoint_group.draw(self.level)
+            self.draw_outlines(surface)
+
+    def draw_outlines(self, surface):
+        '''draw the outlines of the colliders and checkpoints in the viewport'''
+        for group, color in ((self.ground_group, c.RED), (self.step_group, c.RED),
+                             (self.checkpoint_group, c.BLUE)):
+            for collider in group:
+                if collider.rect.colliderect(self.viewport):
+                    pg.draw.rect(surface, color, collider.rect.move(
+                            -self.viewport.x, -self.viewport.y), 2)
+
+    def get_blit_list(self):
+        '''return the (image, position) pairs of all sprites in viewport coordinates, in draw order'''
+        groups = [self.powerup_group, self.brick_group, self.box_group,
+                self.coin_group, self.dying_group, self.brickpiece_group,
+                self.flagpole_group, self.shell_group, self.enemy_group,
+                self.player_group, self.static_coin_group, self.slider_group,
+                self.pipe_group]
+        groups += [score.digit_list for score in self.moving_score_list]
+
+        x, y = self.viewport.x, self.viewport.y
+        return [(sprite.image, (sprite.rect.x - x, sprite.rect.y - y))
+                for group in groups for sprite in group]
+
+    def get_blit_keys(self, blit_list, info_list):
+        keys = {(image, image.get_alpha(), tuple(pos)) for image, pos in blit_list}
+        keys.update((image, image.get_alpha(), tuple(rect.topleft)) for image, rect in info_list)
+        return keys
+
+    def draw_dirty_areas(self, surface, blit_list, info_list):
+        '''only redraw the areas where a sprite or a text image appeared, moved or disappeared.
+           the viewport must be unchanged since the last frame'''
+        changed = self.get_blit_keys(blit_list, info_list) ^ self.last_blits
+        screen_rect = self.level.get_rect()
+        self.dirty_rects = []
+        for image, _, pos in changed:
+            rect = screen_rect.clip(pg.Rect(pos, image.get_size()))
+            if rect.w == 0 or rect.h == 0:
+                continue
+            index = rect.collidelist(self.dirty_rects)
+            if index < 0:
+                self.dirty_rects.append(rect)
+            else:
+                self.dirty_rects[index].union_ip(rect)
 
-        surface.blit(self.level, (0,0), self.viewport)
-        self.overhead_info.draw(surface)
+        for rect in self.dirty_rects:
+            self.level.set_clip(rect)
+            self.level.blit(self.background, rect, rect.move(self.viewport.topleft))
+            self.level.blits([(image, pos) for image, pos in blit_list
+                        if rect.colliderect(pg.Rect(pos, image.get_size()))], False)
+            if c.DEBUG:
+                self.draw_outlines(self.level)
+            surface.blit(self.level, rect, rect)
+        self.level.set_clip(None)
+        surface.blits(info_list, False)
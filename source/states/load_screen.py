@@ -1,12 +1,14 @@
 __author__ = 'marble_xu'
 
-from .. import setup, tools
+from .. import tools
 from .. import constants as c
+from ..context import get_default_context
 from ..components import info
 
 class LoadScreen(tools.State):
-    def __init__(self):
+    def __init__(self, context=None):
         tools.State.__init__(self)
+        self.context = context or get_default_context()
         self.time_list = [2400, 2600, 2635]
         
     def startup(self, current_time, persist):
@@ -16,7 +18,7 @@ class LoadScreen(tools.State):
         self.next = self.set_next_state()
         
         info_state = self.set_info_state()
-        self.overhead_info = info.Info(self.game_info, info_state)
+        self.overhead_info = info.Info(self.context, self.game_info, info_state)
     
     def set_next_state(self):
         return c.LEVEL
@@ -26,19 +28,22 @@ class LoadScreen(tools.State):
 
     def update(self, surface, keys, current_time):
         if (current_time - self.start_time) < self.time_list[0]:
-            surface.fill(c.BLACK)
             self.overhead_info.update(self.game_info)
-            self.overhead_info.draw(surface)
+            if surface is not None:
+                surface.fill(c.BLACK)
+                self.overhead_info.draw(surface)
         elif (current_time - self.start_time) < self.time_list[1]:
-            surface.fill(c.BLACK)
+            if surface is not None:
+                surface.fill(c.BLACK)
         elif (current_time - self.start_time) < self.time_list[2]:
-            surface.fill((106, 150, 252))
+            if surface is not None:
+                surface.fill((106, 150, 252))
         else:
             self.done = True
             
 class GameOver(LoadScreen):
-    def __init__(self):
-        LoadScreen.__init__(self)
+    def __init__(self, context=None):
+        LoadScreen.__init__(self, context)
         self.time_list = [3000, 3200, 3235]
 
     def set_next_state(self):
@@ -48,8 +53,8 @@ class GameOver(LoadScreen):
         return c.GAME_OVER
 
 class TimeOut(LoadScreen):
-    def __init__(self):
-        LoadScreen.__init__(self)
+    def __init__(self, context=None):
+        LoadScreen.__init__(self, context)
         self.time_list = [2400, 2600, 2635]
 
     def set_next_state(self):
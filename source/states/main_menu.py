@@ -7,9 +7,9 @@ The main menu allows players to select their character (Mario or Luigi) and star
 
 import pygame as pg
 from .. import tools
-from .. import setup
 from .. import constants as c
 from .. components import info
+from ..context import get_default_context
 
 class Menu(tools.State):
     """
@@ -25,9 +25,11 @@ class Menu(tools.State):
         player_list (list): A list of player images.
         player_index (int): The current index of the selected player.
         cursor (pygame.sprite.Sprite): The cursor sprite.
+        context (GameContext): The graphics and screen of the game.
     """
-    def __init__(self):
+    def __init__(self, context=None):
         tools.State.__init__(self)
+        self.context = context or get_default_context()
         persist = {c.COIN_TOTAL: 0,
                    c.SCORE: 0,
                    c.LIVES: 3,
@@ -48,7 +50,7 @@ class Menu(tools.State):
         self.next = c.LOAD_SCREEN
         self.persist = persist
         self.game_info = persist
-        self.overhead_info = info.Info(self.game_info, c.MAIN_MENU)
+        self.overhead_info = info.Info(self.context, self.game_info, c.MAIN_MENU)
 
         self.setup_background()
         self.setup_player()
@@ -59,15 +61,12 @@ class Menu(tools.State):
     def setup_background(self):
         """Loads and scales the background image."""
 
-        self.background = setup.GFX['level_1']
+        self.background = self.context.gfx.get_scaled('level_1', c.BACKGROUND_MULTIPLER)
         self.background_rect = self.background.get_rect()
-        self.background = pg.transform.scale(self.background,
-                                    (int(self.background_rect.width*c.BACKGROUND_MULTIPLER),
-                                    int(self.background_rect.height*c.BACKGROUND_MULTIPLER)))
 
-        self.viewport = setup.SCREEN.get_rect(bottom=setup.SCREEN_RECT.bottom)
+        self.viewport = self.context.screen_rect.copy()
         self.image_dict = {}
-        image = tools.get_image(setup.GFX['title_screen'], 1, 60, 176, 88,
+        image = tools.get_image(self.context.gfx['title_screen'], 1, 60, 176, 88,
                             (255, 0, 220), c.SIZE_MULTIPLIER)
         rect = image.get_rect()
         rect.x, rect.y = (170, 100)
@@ -79,7 +78,7 @@ class Menu(tools.State):
         self.player_list = []
         player_rect_info = [(178, 32, 12, 16), (178, 128, 12, 16)]
         for rect in player_rect_info:
-            image = tools.get_image(setup.GFX['mario_bros'],
+            image = tools.get_image(self.context.gfx['mario_bros'],
                                 *rect, c.BLACK, 2.9)
             rect = image.get_rect()
             rect.x, rect.bottom = 110, c.GROUND_HEIGHT
@@ -90,7 +89,7 @@ class Menu(tools.State):
         """Creates the cursor sprite and positions it."""
 
         self.cursor = pg.sprite.Sprite()
-        self.cursor.image = tools.get_image(setup.GFX[c.ITEM_SHEET], 24, 160, 8, 8, c.BLACK, 3)
+        self.cursor.image = tools.get_image(self.context.gfx[c.ITEM_SHEET], 24, 160, 8, 8, c.BLACK, 3)
         rect = self.cursor.image.get_rect()
         rect.x, rect.y = (220, 358)
         self.cursor.rect = rect
@@ -100,7 +99,7 @@ class Menu(tools.State):
         """Updates the main menu.
 
         Args:
-            surface (pygame.Surface): The game's surface.
+            surface (pygame.Surface): The game's surface, or None in headless mode.
             keys (list): A list of pressed keys.
             current_time (float): The current game time.
         """
@@ -112,12 +111,13 @@ class Menu(tools.State):
         self.update_cursor(keys)
         self.overhead_info.update(self.game_info)
 
-        surface.blit(self.background, self.viewport, self.viewport)
-        surface.blit(self.image_dict['GAME_NAME_BOX'][0],
-                     self.image_dict['GAME_NAME_BOX'][1])
-        surface.blit(self.player_image, self.player_rect)
-        surface.blit(self.cursor.image, self.cursor.rect)
-        self.overhead_info.draw(surface)
+        if surface is not None:
+            surface.blit(self.background, self.viewport, self.viewport)
+            surface.blit(self.image_dict['GAME_NAME_BOX'][0],
+                         self.image_dict['GAME_NAME_BOX'][1])
+            surface.blit(self.player_image, self.player_rect)
+            surface.blit(self.cursor.image, self.cursor.rect)
+            self.overhead_info.draw(surface)
 
         elapsed_time = current_time - self.timer_start
         if elapsed_time >= 1000:
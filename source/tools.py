@@ -3,6 +3,8 @@ __author__ = 'marble_xu'
 import os
 import pygame as pg
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping
 
 keybinding = {
     'action':pg.K_s,
@@ -24,6 +26,9 @@ class State():
         done (bool): Flag indicating if the state is finished and needs to be transitioned from.
         next (str or State): The next state to transition to after the current state is finished.
         persist (dict): A dictionary storing persistent data that can be carried across states.
+        dirty_rect_mode (bool): If True, the state may only redraw the changed parts of the screen.
+        dirty_rects (list or None): The screen areas changed by the last update, or None if the
+            whole screen needs to be updated.
     """
 
     def __init__(self):
@@ -36,6 +41,8 @@ class State():
         self.done = False
         self.next = None
         self.persist = {}
+        self.dirty_rect_mode = False
+        self.dirty_rects = None
     
     @abstractmethod
     def startup(self, current_time, persist):
@@ -60,6 +67,17 @@ class State():
 
         self.done = False
         return self.persist
+
+    def prewarm(self):
+        """
+        This method is called while the game is idle, before the state is first entered,
+        once per frame until it returns False. It can load a part of what the startup of
+        the state needs on each call, so the transition is faster without a slow frame.
+
+        Returns:
+            bool: True if there is more to load on the next call.
+        """
+        return False
     
     @abstractmethod
     def update(sefl, surface, keys, current_time):
@@ -70,39 +88,164 @@ class State():
         and responding to user input (keys).
 
         Args:
-            surface (pygame.Surface): The game's surface to draw on.
+            surface (pygame.Surface): The game's surface to draw on, or None if nothing
+                should be drawn (headless mode).
             keys (list): A list of currently pressed keys.
             current_time (float): The current game time.
         """
 
 
+class StateRegistry(Mapping):
+    """
+    The states of the game by name, each one is created by its factory when it is
+    first needed instead of all of them up front.
+
+    Attributes:
+        factories (dict): The function which creates each state.
+        states (dict): The states created so far.
+        prewarming (State): The state whose prewarm has more to load, or None.
+    """
+
+    def __init__(self, factories):
+        self.factories = dict(factories)
+        self.states = {}
+        self.prewarming = None
+
+    def __getitem__(self, name):
+        state = self.states.get(name)
+        if state is None:
+            state = self.factories[name]()
+            self.states[name] = state
+        return state
+
+    def __contains__(self, name):
+        return name in self.factories
+
+    def __iter__(self):
+        return iter(self.factories)
+
+    def __len__(self):
+        return len(self.factories)
+
+    def prewarm(self):
+        '''prewarm a part of the last created state, or create one state which does not
+           exist yet, return False when all of them exist and are prewarmed'''
+        if self.prewarming is not None:
+            if not self.prewarming.prewarm():
+                self.prewarming = None
+            return True
+        for name in self.factories:
+            if name not in self.states:
+                state = self[name]
+                if state.prewarm():
+                    self.prewarming = state
+                return True
+        return False
+
+class RealTimeClock():
+    """
+    A game clock which takes the time of each frame from the wall clock.
+    """
+
+    def next_frame(self):
+        return pg.time.get_ticks()
+
+class FixedStepClock():
+    """
+    A virtual game clock which advances by exactly 1/fps second for every frame,
+    however long the frame really takes. All the timers of the game then depend only
+    on the number of simulated frames, so a run is reproducible at any speed.
+
+    Attributes:
+        fps (int): The number of frames in a second of game time.
+        frames (int): The number of frames simulated so far.
+    """
+
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.frames = 0
+
+    def next_frame(self):
+        current_time = self.frames * 1000 / self.fps
+        self.frames += 1
+        return current_time
+
 class Control():
-    def __init__(self):
+    """
+    Runs the game loop and switches between the game states.
+
+    Args:
+        dirty_rect_mode (bool): Only update the changed parts of the screen.
+        headless (bool): Don't draw anything or update the display.
+        game_clock: The clock which gives the time of each frame, a FixedStepClock
+            by default in headless mode and a RealTimeClock otherwise.
+        speed (float): Run at speed times 60 frames per second, or as fast as possible
+            if 0. Defaults to 0 in headless mode and 1 otherwise.
+        input_recorder (replay.InputRecorder): If given, records the keys of every frame.
+        input_replay (replay.InputReplay): If given, the keys of every frame are taken
+            from it instead of the keyboard, and the game stops when it is finished.
+        prewarm (bool): Create and prewarm the states of a StateRegistry in the idle
+            time of the frames, one state or a part of its prewarm each frame. Only when
+            the speed is limited, so there is idle time.
+    """
+
+    def __init__(self, dirty_rect_mode=False, headless=False, game_clock=None, speed=None,
+                input_recorder=None, input_replay=None, prewarm=False):
         self.screen = pg.display.get_surface()
+        self.dirty_rect_mode = dirty_rect_mode
+        self.headless = headless
+        if game_clock is None:
+            game_clock = FixedStepClock() if headless else RealTimeClock()
+        self.game_clock = game_clock
+        if speed is None:
+            speed = 0 if headless else 1
+        self.speed = speed
+        self.input_recorder = input_recorder
+        self.input_replay = input_replay
+        self.prewarm = prewarm and speed > 0
         self.done = False
         self.clock = pg.time.Clock()
         self.fps = 60
         self.current_time = 0.0
+        self.frames = 0
         self.keys = pg.key.get_pressed()
         self.state_dict = {}
         self.state_name = None
         self.state = None
     
     def setup_states(self, state_dict, start_state):
+        '''state_dict is a dict of the states or a StateRegistry'''
         self.state_dict = state_dict
         self.state_name = start_state
-        self.state = self.state_dict[self.state_name]
+        self.state = self.get_state(self.state_name)
+        if not isinstance(state_dict, StateRegistry):
+            self.prewarm = False
+
+    def get_state(self, name):
+        state = self.state_dict[name]
+        state.dirty_rect_mode = self.dirty_rect_mode
+        return state
     
     def update(self):
-        self.current_time = pg.time.get_ticks()
+        if self.input_replay is not None:
+            keys = self.input_replay.next_keys()
+            if keys is None:
+                self.done = True
+                return
+            self.keys = keys
+        self.current_time = self.game_clock.next_frame()
+        self.frames += 1
         if self.state.done:
             self.flip_state()
-        self.state.update(self.screen, self.keys, self.current_time)
+        if self.input_recorder is not None:
+            self.input_recorder.record(self.keys)
+        surface = None if self.headless else self.screen
+        self.state.update(surface, self.keys, self.current_time)
     
     def flip_state(self):
         previous, self.state_name = self.state_name, self.state.next
         persist = self.state.cleanup()
-        self.state = self.state_dict[self.state_name]
+        self.state = self.get_state(self.state_name)
         self.state.startup(self.current_time, persist)
 
     def event_loop(self):
@@ -114,14 +257,72 @@ class Control():
             elif event.type == pg.KEYUP:
                 self.keys = pg.key.get_pressed()
     
-    def main(self):
+    def main(self, max_frames=None):
         while not self.done:
-            self.event_loop()
+            if max_frames is not None and self.frames >= max_frames:
+                break
+            if not self.headless:
+                self.event_loop()
             self.update()
-            pg.display.update()
-            self.clock.tick(self.fps)
+            if not self.headless:
+                if self.state.dirty_rects is None:
+                    pg.display.update()
+                else:
+                    pg.display.update(self.state.dirty_rects)
+            if self.prewarm:
+                self.prewarm = self.state_dict.prewarm()
+            if self.speed:
+                self.clock.tick(self.fps * self.speed)
+
+class FrameCache():
+    """
+    A process wide cache of the frames cut out of the sprite sheets.
 
-def get_image(sheet, x, y, width, height, colorkey, scale):
+    Every sprite of the same kind uses the same frames, so the frames are cut,
+    colorkeyed, scaled and flipped once and then shared by all the sprites.
+    The cached images must be treated as read only.
+
+    Attributes:
+        frames (dict): The cached images, keyed by (sheet, rect, colorkey, scale, flip).
+        hits (int): The number of images returned from the cache.
+        misses (int): The number of images that had to be created.
+    """
+
+    def __init__(self):
+        self.frames = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_image(self, sheet, x, y, width, height, colorkey, scale,
+                    flip_x=False, flip_y=False):
+        key = (sheet, x, y, width, height, colorkey, scale, flip_x, flip_y)
+        image = self.frames.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        if flip_x or flip_y:
+            image = self.get_image(sheet, x, y, width, height, colorkey, scale)
+            image = pg.transform.flip(image, flip_x, flip_y)
+        else:
+            image = cut_image(sheet, x, y, width, height, colorkey, scale)
+        self.frames[key] = image
+        return image
+
+    def clear(self):
+        self.frames = {}
+        self.hits = 0
+        self.misses = 0
+
+frame_cache = FrameCache()
+
+def get_image(sheet, x, y, width, height, colorkey, scale, flip_x=False, flip_y=False):
+    '''return a shared frame from the frame cache, the image must not be modified'''
+    return frame_cache.get_image(sheet, x, y, width, height, colorkey, scale,
+                                flip_x, flip_y)
+
+def cut_image(sheet, x, y, width, height, colorkey, scale):
         image = pg.Surface([width, height])
         rect = image.get_rect()
 
@@ -132,16 +333,111 @@ def get_image(sheet, x, y, width, height, colorkey, scale):
                                     int(rect.height*scale)))
         return image
 
-def load_all_gfx(directory, colorkey=(255,0,255), accept=('.png', '.jpg', '.bmp', '.gif')):
-    graphics = {}
-    for pic in os.listdir(directory):
-        name, ext = os.path.splitext(pic)
-        if ext.lower() in accept:
-            img = pg.image.load(os.path.join(directory, pic))
-            if img.get_alpha():
-                img = img.convert_alpha()
-            else:
-                img = img.convert()
-                img.set_colorkey(colorkey)
-            graphics[name] = img
-    return graphics
+def load_image(file_path, colorkey=(255,0,255)):
+    img = pg.image.load(file_path)
+    if img.get_alpha():
+        img = img.convert_alpha()
+    else:
+        img = img.convert()
+        img.set_colorkey(colorkey)
+    return img
+
+class Graphics(Mapping):
+    """
+    The images of a directory, keyed by file name without extension. An image is
+    loaded and converted when it is first accessed, so images which are never used
+    are never loaded. This needs the display mode to be set before the first access.
+
+    The images for which evictable(name) is true, the level backgrounds, are only
+    needed while their level is played. At most max_evictable of them are kept
+    loaded, loading another one drops the one which was least recently accessed.
+    A dropped image is loaded again when it is accessed again.
+
+    Images given by add and add_scaled, from a bundle (see source.bundle), are
+    used instead of loading or scaling and are never dropped.
+
+    Attributes:
+        paths (dict): The file path of each image.
+        images (dict): The loaded images.
+        scaled (dict): The prescaled images, keyed by (name, scale).
+        loads (int): The number of images loaded so far.
+    """
+
+    def __init__(self, directory, colorkey=(255,0,255), accept=('.png', '.jpg', '.bmp', '.gif'),
+                    evictable=None, max_evictable=1):
+        self.colorkey = colorkey
+        self.paths = {}
+        for pic in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(pic)
+            if ext.lower() in accept:
+                self.paths[name] = os.path.join(directory, pic)
+        self.images = {}
+        self.scaled = {}
+        self.evictable = evictable
+        self.max_evictable = max_evictable
+        self.recent = OrderedDict()
+        self.loads = 0
+
+    def __getitem__(self, name):
+        image = self.images.get(name)
+        if image is None:
+            image = self.load(name)
+        elif name in self.recent:
+            self.recent.move_to_end(name)
+        return image
+
+    def __contains__(self, name):
+        return name in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def load(self, name):
+        image = load_image(self.paths[name], self.colorkey)
+        self.loads += 1
+        if self.evictable is not None and self.evictable(name):
+            while len(self.recent) >= self.max_evictable:
+                self.evict(next(iter(self.recent)))
+            self.recent[name] = None
+        self.images[name] = image
+        return image
+
+    def add(self, name, image):
+        self.images[name] = image
+        self.recent.pop(name, None)
+
+    def add_scaled(self, name, scale, image):
+        self.scaled[(name, scale)] = image
+
+    def get_scaled(self, name, scale):
+        '''return the image scaled by scale, a new image unless it is prescaled'''
+        image = self.scaled.get((name, scale))
+        if image is not None:
+            return image
+        image = self[name]
+        rect = image.get_rect()
+        image = pg.transform.scale(image, (int(rect.width*scale), int(rect.height*scale)))
+        # without the alpha channel an opaque image is copied instead of blended
+        # when drawn
+        if not image.get_flags() & pg.SRCALPHA:
+            image = image.convert()
+        return image
+
+    def evict(self, name):
+        '''drop the loaded image, it is loaded again on the next access'''
+        self.images.pop(name, None)
+        self.recent.pop(name, None)
+
+    def load_all(self):
+        '''load every image which is not loaded yet, evictable images included'''
+        for name in self.paths:
+            if name not in self.images:
+                self.load(name)
+
+def load_all_gfx(directory, colorkey=(255,0,255), accept=('.png', '.jpg', '.bmp', '.gif'),
+                    evictable=None, max_evictable=1):
+    '''return the images of the directory as a Graphics, which loads them on first access'''
+    return Graphics(directory, colorkey, accept, evictable, max_evictable)